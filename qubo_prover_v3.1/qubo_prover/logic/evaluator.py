@@ -61,6 +61,56 @@ def evaluate(expr: Expr, assignment: Assignment) -> bool:
     raise ValueError(f"Unknown expression type: {type(expr)}")
 
 
+def evaluate_mask(expr: Expr, mask: int, var_to_bit: Dict[str, int],
+                  known: int = -1) -> bool:
+    """
+    在位掩码表示的赋值下求值公式
+    
+    变量 v 的真值为 mask 的第 var_to_bit[v] 位。适用于同一组公式
+    需要在大量赋值下反复求值的场景（赋值可作为整数缓存键）。
+    
+    Args:
+        expr: 逻辑公式
+        mask: 赋值位掩码
+        var_to_bit: 变量名 -> 位序号
+        known: 已赋值变量的位掩码，默认所有位均已赋值
+        
+    Returns:
+        公式在该赋值下的真值
+        
+    Raises:
+        KeyError: 变量未定义（不在 var_to_bit 中或对应位不在 known 中）
+    """
+    if isinstance(expr, Var):
+        bit = var_to_bit[expr.name]
+        if not (known >> bit) & 1:
+            raise KeyError(f"Variable '{expr.name}' not in assignment")
+        return bool((mask >> bit) & 1)
+    
+    if isinstance(expr, Not):
+        return not evaluate_mask(expr.operand, mask, var_to_bit, known)
+    
+    if isinstance(expr, And):
+        return (evaluate_mask(expr.left, mask, var_to_bit, known)
+                and evaluate_mask(expr.right, mask, var_to_bit, known))
+    
+    if isinstance(expr, Or):
+        return (evaluate_mask(expr.left, mask, var_to_bit, known)
+                or evaluate_mask(expr.right, mask, var_to_bit, known))
+    
+    if isinstance(expr, Imply):
+        left_val = evaluate_mask(expr.left, mask, var_to_bit, known)
+        right_val = evaluate_mask(expr.right, mask, var_to_bit, known)
+        return (not left_val) or right_val
+    
+    if isinstance(expr, Iff):
+        left_val = evaluate_mask(expr.left, mask, var_to_bit, known)
+        right_val = evaluate_mask(expr.right, mask, var_to_bit, known)
+        return left_val == right_val
+    
+    raise ValueError(f"Unknown expression type: {type(expr)}")
+
+
 def evaluate_safe(expr: Expr, assignment: Assignment, default: bool = False) -> bool:
     """
     安全求值（未定义变量使用默认值）
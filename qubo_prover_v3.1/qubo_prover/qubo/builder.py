@@ -35,6 +35,8 @@ class QUBOProblem:
     axiom_vars: List[str]                   # 公理变量
     goal_var: str                           # 目标变量
     info: Dict[str, Any] = field(default_factory=dict)  # 附加信息
+    axiom_formulas: List[Expr] = field(default_factory=list)  # 公理公式
+    _structure_cache: Optional[Tuple] = field(default=None, repr=False, compare=False)  # 解码器使用的结构约束索引表
 
 
 class QUBOBuilder:
@@ -155,7 +157,8 @@ class QUBOBuilder:
             encoder=self.encoder,
             axiom_vars=[enc.var_name for enc in self.axiom_encodings],
             goal_var=self.goal_encoding.var_name,
-            info=info
+            info=info,
+            axiom_formulas=list(self.axioms)
         )
     
     def _build_hamiltonian(self, rule_weights: Dict[str, float]) -> Any:
@@ -15,6 +15,7 @@
 """
 
 from __future__ import annotations
+import sys
 from typing import Dict, Tuple, Set, List, Optional, Any
 from dataclasses import dataclass, field
 from pyqubo import Binary
@@ -60,6 +61,9 @@ class FormulaEncoder:
         self._constraints: List[Tuple[str, Any]] = []   # (约束类型, 约束表达式)
         self._prop_vars: Set[str] = set()               # 命题变量集合
         self._counter = 0                               # 辅助变量计数器
+        # 结构约束的扁平变量名表，供解码器直接遍历验证
+        self._not_constraints: List[Tuple[str, str]] = []          # (Not_P, P)
+        self._imply_constraints: List[Tuple[str, str, str]] = []   # (Imp, P, Q)
     
     def encode(self, formula: Expr, force_new: bool = False) -> EncodedFormula:
         """
@@ -94,7 +98,7 @@ class FormulaEncoder:
     
     def _encode_var(self, var: Var) -> EncodedFormula:
         """编码命题变量"""
-        var_name = f"{self.prefix}{var.name}" if self.prefix else var.name
+        var_name = sys.intern(f"{self.prefix}{var.name}" if self.prefix else var.name)
         
         if var_name not in self._var_map:
             self._var_map[var_name] = Binary(var_name)
@@ -128,6 +132,7 @@ class FormulaEncoder:
         # 添加约束: Not_P + P = 1
         constraint = (qubo_var + operand_enc.qubo_var - 1) ** 2
         self._constraints.append(("NOT", constraint))
+        self._not_constraints.append((var_name, operand_enc.var_name))
         
         encoded = EncodedFormula(
             var_name=var_name,
@@ -217,6 +222,7 @@ class FormulaEncoder:
         P, Q, I = left_enc.qubo_var, right_enc.qubo_var, qubo_var
         constraint = (I - 1 + P - P*Q) ** 2
         self._constraints.append(("IMPLY", constraint))
+        self._imply_constraints.append((var_name, left_enc.var_name, right_enc.var_name))
         
         encoded = EncodedFormula(
             var_name=var_name,
@@ -258,10 +264,14 @@ class FormulaEncoder:
         return encoded
     
     def _make_var_name(self, op: str, *operand_names: str) -> str:
-        """生成唯一的变量名"""
+        """
+        生成唯一的变量名
+        
+        名称经过 sys.intern 驻留，解码/验证阶段以其为键的字典查找可直接按指针比较。
+        """
         self._counter += 1
         operands = "_".join(self._shorten_name(n) for n in operand_names)
-        return f"{self.prefix}{op}_{operands}_{self._counter}"
+        return sys.intern(f"{self.prefix}{op}_{operands}_{self._counter}")
     
     def _shorten_name(self, name: str, max_len: int = 10) -> str:
         """缩短变量名"""
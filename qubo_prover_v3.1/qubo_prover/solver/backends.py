@@ -9,20 +9,77 @@
 
 from __future__ import annotations
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
 from typing import Any, Optional, Dict
 from dataclasses import dataclass
+import numpy as np
+
+
+class _MatrixSamples(Sequence):
+    """
+    样本矩阵的只读字典视图
+    
+    支持 len()、下标、切片与迭代，访问某一行时才构造 {变量名: 取值} 字典。
+    """
+    
+    __slots__ = ("_matrix", "_var_index")
+    
+    def __init__(self, matrix: np.ndarray, var_index: Dict[str, int]):
+        self._matrix = matrix
+        self._var_index = var_index
+    
+    def __len__(self) -> int:
+        return len(self._matrix)
+    
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        row = self._matrix[idx]
+        return {name: int(row[col]) for name, col in self._var_index.items()}
 
 
 @dataclass
 class SampleResult:
     """
     采样结果
+    
+    样本有两种存储方式：
+    - samples: 字典列表（AoS），每个样本一个 {变量名: 取值}
+    - samples_matrix + var_index: 样本矩阵（SoA），形状为 (样本数, 变量数)，
+      var_index 给出变量名到列号的映射
+    
+    提供 samples_matrix 时 samples 为矩阵的只读字典视图，按下标访问时才构造字典。
+    
+    若提供 num_occurrences，则每一行代表一个去重后的样本及其出现次数
+    （NealBackend 会合并重复样本）。此时 samples / energies 的长度为去重后的
+    行数 num_rows，可能小于 num_reads；含重复的总样本数见 num_samples。
     """
-    samples: list                # 样本列表
-    energies: list              # 能量列表
-    num_reads: int              # 采样次数
+    samples: Sequence            # 样本列表（SoA 布局下为只读视图），每行一个
+    energies: list              # 能量列表（或一维 ndarray），与 samples 逐行对应
+    num_reads: int              # 请求的采样次数
     timing: Optional[Dict] = None  # 计时信息
     info: Optional[Dict] = None    # 其他信息
+    samples_matrix: Optional[np.ndarray] = None  # 样本矩阵 (n_samples, n_vars), int8
+    var_index: Optional[Dict[str, int]] = None   # 变量名 -> 列号
+    best_idx: Optional[int] = None               # 能量最低样本的下标（由后端在汇总时填写）
+    best_energy: Optional[float] = None          # 最低能量
+    num_occurrences: Optional[np.ndarray] = None # 每个去重样本的出现次数
+    
+    @property
+    def num_rows(self) -> int:
+        """存储的样本行数（去重后）"""
+        return len(self.samples)
+    
+    @property
+    def num_samples(self) -> int:
+        """样本数量（含重复）"""
+        if self.num_occurrences is not None:
+            return int(self.num_occurrences.sum())
+        return self.num_rows
+    
+    def sample_at(self, idx: int) -> Dict[str, int]:
+        """获取第 idx 个样本的字典形式"""
+        return self.samples[idx]
 
 
 class SamplerBackend(ABC):
@@ -111,24 +168,29 @@ class NealBackend(SamplerBackend):
         # 执行采样
         sampleset = sampler.sample(bqm, **params)
         
-        # 转换结果
-        samples = []
-        energies = []
+        # 合并重复样本（退火常返回大量相同的比特串），保留出现次数；
+        # 之后 samples / energies 按去重后的行存放，行数可能小于 num_reads
+        sampleset = sampleset.aggregate()
         
-        for sample, energy in zip(sampleset.record.sample, sampleset.record.energy):
-            assignment = {
-                v: int(sample[idx])
-                for idx, v in enumerate(sampleset.variables)
-            }
-            samples.append(assignment)
-            energies.append(float(energy))
+        # 转换结果：直接保留 record 中的样本矩阵，不逐个展开为字典
+        record = sampleset.record
+        energies = np.asarray(record.energy, dtype=np.float64)
+        best_idx = int(np.argmin(energies)) if len(energies) else None
+        
+        samples_matrix = np.ascontiguousarray(record.sample, dtype=np.int8)
+        var_index = {v: idx for idx, v in enumerate(sampleset.variables)}
         
         return SampleResult(
-            samples=samples,
+            samples=_MatrixSamples(samples_matrix, var_index),
             energies=energies,
             num_reads=num_reads,
             timing=dict(sampleset.info.get("timing", {})) if hasattr(sampleset, "info") else None,
-            info={"backend": self.name}
+            info={"backend": self.name},
+            samples_matrix=samples_matrix,
+            var_index=var_index,
+            best_idx=best_idx,
+            best_energy=float(energies[best_idx]) if best_idx is not None else None,
+            num_occurrences=np.asarray(record.num_occurrences),
         )
     
     def is_available(self) -> bool:
@@ -193,9 +255,11 @@ class OpenJijBackend(SamplerBackend):
             num_sweeps=kwargs.get("num_sweeps", self.num_sweeps),
         )
         
-        # 转换结果
+        # 转换结果（同时记录能量最低的样本）
         samples = []
         energies = []
+        best_idx = None
+        best_energy = None
         
         states = getattr(response, "states", None)
         energy_list = getattr(response, "energies", None)
@@ -203,14 +267,19 @@ class OpenJijBackend(SamplerBackend):
         if states is not None and energy_list is not None:
             for st, en in zip(states, energy_list):
                 if isinstance(st, dict):
+                    en = float(en)
+                    if best_energy is None or en < best_energy:
+                        best_idx, best_energy = len(samples), en
                     samples.append({str(k): int(v) for k, v in st.items()})
-                    energies.append(float(en))
+                    energies.append(en)
         
         return SampleResult(
             samples=samples,
             energies=energies,
             num_reads=num_reads,
-            info={"backend": self.name}
+            info={"backend": self.name},
+            best_idx=best_idx,
+            best_energy=best_energy
         )
     
     def is_available(self) -> bool:
@@ -251,7 +320,9 @@ class ExactBackend(SamplerBackend):
                 samples=samples,
                 energies=energies,
                 num_reads=1,
-                info={"backend": self.name, "is_exact": True}
+                info={"backend": self.name, "is_exact": True},
+                best_idx=0,
+                best_energy=energies[0]
             )
         except ImportError:
             raise RuntimeError("dimod 未安装")
@@ -6,10 +6,41 @@
 
 from __future__ import annotations
 from typing import Dict, List, Tuple, Any, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import numpy as np
 from .backends import SampleResult
+from ..logic.evaluator import evaluate
 from ..qubo.builder import QUBOProblem
 
+try:
+    from numba import njit
+except ImportError:  # numba 为可选依赖，缺失时退回纯 Python 循环
+    njit = None
+
+
+class _LazyDetails:
+    """
+    DecodedResult.details 的描述符
+    
+    构造时可显式传入 details；未传入（为 None）时在首次访问时由原始字段组装并缓存。
+    """
+    
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return None  # dataclass 以此作为字段默认值
+        details = obj.__dict__.get("details")
+        if details is None and obj._num_samples is not None:
+            details = obj.__dict__["details"] = {
+                "structure_ok": obj._structure_ok,
+                "structure_msg": obj._structure_msg,
+                "num_samples": obj._num_samples,
+                "best_idx": obj._best_idx
+            }
+        return details
+    
+    def __set__(self, obj, value):
+        obj.__dict__["details"] = value
+
 
 @dataclass
 class DecodedResult:
@@ -23,7 +54,25 @@ class DecodedResult:
     is_valid: bool                  # 是否为有效解
     proof_valid: bool               # 证明是否有效
     message: str                    # 验证消息
-    details: Dict[str, Any] = None  # 详细信息
+    details: Optional[Dict[str, Any]] = _LazyDetails()  # 详细信息（为 None 时按需由下列字段组装）
+    # 详细信息的原始字段
+    _structure_ok: bool = field(default=False, repr=False)
+    _structure_msg: str = field(default="", repr=False)
+    _num_samples: Optional[int] = field(default=None, repr=False)
+    _best_idx: int = field(default=-1, repr=False)
+    _prop_keys_cache: Optional[frozenset] = field(default=None, repr=False, compare=False)
+
+
+def _get_prop_keys(decoded: DecodedResult) -> frozenset:
+    """
+    获取命题变量名集合（单个大写字母），首次调用后缓存在结果上
+    """
+    keys = decoded._prop_keys_cache
+    if keys is None:
+        keys = frozenset(k for k in decoded.assignment
+                         if len(k) == 1 and 'A' <= k <= 'Z')
+        decoded._prop_keys_cache = keys
+    return keys
 
 
 def decode_result(sample_result: SampleResult, 
@@ -38,7 +87,7 @@ def decode_result(sample_result: SampleResult,
     Returns:
         解码后的结果
     """
-    if not sample_result.samples:
+    if sample_result.num_rows == 0:
         return DecodedResult(
             assignment={},
             energy=float('inf'),
@@ -49,28 +98,44 @@ def decode_result(sample_result: SampleResult,
             message="没有找到解"
         )
     
-    # 选择能量最低的解
-    best_idx = 0
-    best_energy = sample_result.energies[0]
-    for i, e in enumerate(sample_result.energies):
-        if e < best_energy:
-            best_energy = e
-            best_idx = i
+    # 选择能量最低的解（优先使用后端汇总时记录的结果）
+    if sample_result.best_idx is not None:
+        best_idx = sample_result.best_idx
+        best_energy = float(sample_result.best_energy)
+    else:
+        energies = np.asarray(sample_result.energies, dtype=np.float64)
+        best_idx = int(np.argmin(energies))
+        best_energy = float(energies[best_idx])
     
-    assignment = sample_result.samples[best_idx]
+    assignment = sample_result.sample_at(best_idx)
+    
+    if sample_result.samples_matrix is not None:
+        # SoA 布局：公理/目标检查直接读取最优样本行
+        row = sample_result.samples_matrix[best_idx]
+        var_index = sample_result.var_index
+        
+        def _is_true(name: str) -> bool:
+            col = var_index.get(name)
+            return col is not None and bool(row[col] == 1)
+    else:
+        def _is_true(name: str) -> bool:
+            return assignment.get(name, 0) == 1
     
     # 验证公理
-    axioms_ok = True
-    for ax_var in qubo_problem.axiom_vars:
-        if assignment.get(ax_var, 0) != 1:
-            axioms_ok = False
-            break
+    axioms_ok = all(_is_true(ax_var) for ax_var in qubo_problem.axiom_vars)
     
     # 验证目标
-    goal_ok = assignment.get(qubo_problem.goal_var, 0) == 1
+    goal_ok = _is_true(qubo_problem.goal_var)
     
-    # 验证结构约束
-    structure_ok, structure_msg = _verify_structure(assignment, qubo_problem)
+    # 验证结构约束（公理或目标已失败时证明必然无效，跳过结构检查）
+    if not (axioms_ok and goal_ok):
+        structure_ok, structure_msg = True, ""
+    elif sample_result.samples_matrix is not None:
+        structure_ok, structure_msg = _verify_structure_packed(
+            row, sample_result.var_index, qubo_problem
+        )
+    else:
+        structure_ok, structure_msg = _verify_structure(assignment, qubo_problem)
     
     # 综合判断
     is_valid = axioms_ok and goal_ok
@@ -95,52 +160,129 @@ def decode_result(sample_result: SampleResult,
         is_valid=is_valid,
         proof_valid=proof_valid,
         message=message,
-        details={
-            "structure_ok": structure_ok,
-            "structure_msg": structure_msg,
-            "num_samples": len(sample_result.samples),
-            "best_idx": best_idx
-        }
+        _structure_ok=structure_ok,
+        _structure_msg=structure_msg,
+        _num_samples=sample_result.num_samples,
+        _best_idx=best_idx
     )
 
 
+def _structure_name_tables(qubo_problem: QUBOProblem
+                           ) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str, str]]]:
+    """
+    获取结构约束涉及的变量名（编码阶段已生成）
+    
+    Returns:
+        (否定约束 [(Not_P, P)], 蕴涵约束 [(Imp, P, Q)])
+    """
+    encoder = qubo_problem.encoder
+    return encoder._not_constraints, encoder._imply_constraints
+
+
 def _verify_structure(assignment: Dict[str, int], 
                       qubo_problem: QUBOProblem) -> Tuple[bool, str]:
     """
     验证结构约束
     """
-    encoder = qubo_problem.encoder
+    not_pairs, imply_triples = _structure_name_tables(qubo_problem)
+    _get = assignment.get
     
     # 验证否定约束：Not_P + P = 1
-    for formula, enc in encoder._formula_map.items():
-        from ..logic.ast import Not
-        if isinstance(formula, Not):
-            operand_enc = encoder.get_encoded(formula.operand)
-            if operand_enc:
-                not_val = assignment.get(enc.var_name, 0)
-                op_val = assignment.get(operand_enc.var_name, 0)
-                if not_val + op_val != 1:
-                    return False, f"否定约束违反: {enc.var_name}={not_val}, {operand_enc.var_name}={op_val}"
-    
-    # 验证蕴涵约束
-    for formula, enc in encoder._formula_map.items():
-        from ..logic.ast import Imply
-        if isinstance(formula, Imply):
-            imp_val = assignment.get(enc.var_name, 0)
-            left_enc = encoder.get_encoded(formula.left)
-            right_enc = encoder.get_encoded(formula.right)
-            
-            if left_enc and right_enc:
-                p_val = assignment.get(left_enc.var_name, 0)
-                q_val = assignment.get(right_enc.var_name, 0)
-                
-                # P->Q=1 意味着 P=0 或 Q=1
-                if imp_val == 1 and p_val == 1 and q_val == 0:
-                    return False, f"蕴涵约束违反: {enc.var_name}=1, {left_enc.var_name}=1, {right_enc.var_name}=0"
+    for not_name, op_name in not_pairs:
+        not_val = _get(not_name, 0)
+        op_val = _get(op_name, 0)
+        if not_val + op_val != 1:
+            return False, f"否定约束违反: {not_name}={not_val}, {op_name}={op_val}"
+    
+    # 验证蕴涵约束：P->Q=1 意味着 P=0 或 Q=1
+    for imp_name, p_name, q_name in imply_triples:
+        if _get(imp_name, 0) == 1 and _get(p_name, 0) == 1 and _get(q_name, 0) == 0:
+            return False, f"蕴涵约束违反: {imp_name}=1, {p_name}=1, {q_name}=0"
     
     return True, ""
 
 
+def _find_structure_violation(vals: np.ndarray,
+                              not_pairs: np.ndarray,
+                              imply_triples: np.ndarray) -> int:
+    """
+    在打包的赋值向量上查找第一个违反的结构约束
+    
+    Returns:
+        否定约束返回其下标 i，蕴涵约束返回 len(not_pairs) + j，全部满足返回 -1
+    """
+    for i in range(not_pairs.shape[0]):
+        if vals[not_pairs[i, 0]] + vals[not_pairs[i, 1]] != 1:
+            return i
+    
+    offset = not_pairs.shape[0]
+    for j in range(imply_triples.shape[0]):
+        if (vals[imply_triples[j, 0]] == 1 and vals[imply_triples[j, 1]] == 1
+                and vals[imply_triples[j, 2]] == 0):
+            return offset + j
+    
+    return -1
+
+
+if njit is not None:
+    _find_structure_violation = njit(cache=True, boundscheck=False)(_find_structure_violation)
+
+
+def _structure_index_tables(qubo_problem: QUBOProblem, var_index: Dict[str, int]):
+    """
+    将结构约束的变量名映射为样本行中的列号
+    
+    样本中不存在的变量映射到末尾追加的常量 0 槽位（列号 len(var_index)），
+    与字典版本中 assignment.get(name, 0) 的语义一致。
+    结果按 var_index 缓存在 QUBO 问题上，同一批样本只需构建一次。
+    """
+    cache = qubo_problem._structure_cache
+    if cache is not None and cache[0] == var_index:
+        return cache[1:]
+    
+    not_names, imply_names = _structure_name_tables(qubo_problem)
+    missing = len(var_index)
+    _col = var_index.get
+    
+    not_idx = np.array(
+        [[_col(a, missing), _col(b, missing)] for a, b in not_names],
+        dtype=np.int32,
+    ).reshape(-1, 2)
+    imply_idx = np.array(
+        [[_col(a, missing), _col(b, missing), _col(c, missing)] for a, b, c in imply_names],
+        dtype=np.int32,
+    ).reshape(-1, 3)
+    
+    qubo_problem._structure_cache = (var_index, not_idx, imply_idx, not_names, imply_names)
+    return not_idx, imply_idx, not_names, imply_names
+
+
+def _verify_structure_packed(row: np.ndarray, var_index: Dict[str, int],
+                             qubo_problem: QUBOProblem) -> Tuple[bool, str]:
+    """
+    验证结构约束（SoA 样本行版本）
+    """
+    not_idx, imply_idx, not_names, imply_names = _structure_index_tables(qubo_problem, var_index)
+    vals = np.append(row.astype(np.int8, copy=False), np.int8(0))
+    
+    bad = _find_structure_violation(vals, not_idx, imply_idx)
+    if bad < 0:
+        return True, ""
+    
+    # 仅在失败时解码为消息
+    if bad < len(not_names):
+        not_name, op_name = not_names[bad]
+        a, b = not_idx[bad]
+        return False, f"否定约束违反: {not_name}={int(vals[a])}, {op_name}={int(vals[b])}"
+    
+    imp_name, p_name, q_name = imply_names[bad - len(not_names)]
+    return False, f"蕴涵约束违反: {imp_name}=1, {p_name}=1, {q_name}=0"
+
+
+# 非公式变量（规则控制变量、证明步骤变量）的名称前缀
+_NON_FORMULA_PREFIXES = ("Rule_", "step_")
+
+
 def extract_assignment(decoded: DecodedResult, 
                        var_filter: Optional[str] = None) -> Dict[str, int]:
     """
@@ -157,15 +299,14 @@ def extract_assignment(decoded: DecodedResult,
     
     if var_filter == "prop":
         # 只返回单字母命题变量
-        return {k: v for k, v in assignment.items() 
-                if len(k) == 1 and k.isupper()}
+        return {k: assignment[k] for k in _get_prop_keys(decoded)}
     elif var_filter == "true":
         # 只返回值为1的变量
         return {k: v for k, v in assignment.items() if v == 1}
     elif var_filter == "formula":
         # 排除规则变量
         return {k: v for k, v in assignment.items() 
-                if not k.startswith("Rule_") and not k.startswith("step_")}
+                if not k.startswith(_NON_FORMULA_PREFIXES)}
     
     return assignment
 
@@ -189,28 +330,19 @@ def verify_proof(decoded: DecodedResult,
     assignment = decoded.assignment
     
     # 检查命题变量赋值的一致性
-    prop_values: Dict[str, int] = {}
-    for var_name, value in assignment.items():
-        # 提取命题变量
-        if len(var_name) == 1 and var_name.isupper():
-            prop_values[var_name] = value
-    
-    # 使用语义求值验证
-    from ..logic.evaluator import evaluate
-    from ..logic.parser import parse
-    
-    var_info = qubo_problem.encoder._formula_map
+    prop_values: Dict[str, int] = {k: assignment[k] for k in _get_prop_keys(decoded)}
     
     # 将整数赋值转换为布尔赋值
     bool_assignment = {k: bool(v) for k, v in prop_values.items()}
     
-    # 验证每个公理
-    for ax_str in [str(f) for f in var_info.values() if str(f) in str(qubo_problem.axiom_vars)]:
+    # 验证每个公理在命题变量赋值下为真
+    for axiom in qubo_problem.axiom_formulas:
         try:
-            # 简化处理：跳过复杂验证
-            pass
-        except Exception:
-            pass
+            if not evaluate(axiom, bool_assignment):
+                return False, f"语义验证失败：公理 {axiom} 在当前赋值下为假"
+        except KeyError:
+            # 变量缺失，跳过验证
+            continue
     
     return True, "证明验证通过"
 
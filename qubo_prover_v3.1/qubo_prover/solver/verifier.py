@@ -5,14 +5,44 @@
 """
 
 from __future__ import annotations
-from typing import Dict, List, Tuple, Any, Optional
+from typing import Dict, List, Tuple, Any, Optional, FrozenSet
 from dataclasses import dataclass
 from enum import Enum
-from ..logic.ast import Expr
-from ..logic.evaluator import evaluate, entails
+from functools import lru_cache
+import numpy as np
+from ..logic.ast import Expr, Imply
+from ..logic.evaluator import evaluate_mask, entails
 from ..logic.parser import parse
 
 
+@lru_cache(maxsize=10_000)
+def _entails_cached(premises: FrozenSet[Expr], conclusion: Expr) -> bool:
+    """
+    带缓存的语义蕴涵判定
+    
+    蕴涵关系与前提顺序、重复无关，因此以前提的 frozenset 作为键。
+    Expr 不可变且支持结构相等与哈希，可以直接作为缓存键。
+    """
+    return entails(list(premises), conclusion)
+
+
+# 命题变量（单个大写字母）到位序号的固定映射
+_PROP_BITS: Dict[str, int] = {chr(ord('A') + i): i for i in range(26)}
+
+# 语法验证快速路径接受的取值类型
+_INT_TYPES = frozenset((int, bool))
+
+
+@lru_cache(maxsize=10_000)
+def _evaluate_prop_mask(expr: Expr, mask: int, known: int) -> bool:
+    """以 (公式, 赋值掩码) 为键缓存的求值"""
+    return evaluate_mask(expr, mask, _PROP_BITS, known)
+
+
+# 解析结果缓存：Expr 为不可变（frozen dataclass），可在多次调用间安全共享
+_parse_cached = lru_cache(maxsize=2048)(parse)
+
+
 class VerificationStatus(Enum):
     """验证状态"""
     VALID = "valid"           # 有效证明
@@ -110,6 +140,19 @@ class ProofVerifier:
     
     def _verify_syntax(self, assignment: Dict[str, int]) -> Tuple[bool, str]:
         """语法验证"""
+        # 快速路径：取值全部为 int / bool 时一次性向量化检查；
+        # 其他类型（字符串、浮点数等）交给下面的逐个检查，避免被 numpy 隐式转换
+        values = assignment.values()
+        if set(map(type, values)) <= _INT_TYPES:
+            try:
+                vals = np.fromiter(values, dtype=np.int8, count=len(assignment))
+            except OverflowError:
+                pass  # 超出 int8 范围的整数必然不是二进制
+            else:
+                if not ((vals != 0) & (vals != 1)).any():
+                    return True, "格式正确"
+        
+        # 慢速路径：定位第一个非法变量以生成消息
         for var, val in assignment.items():
             if val not in (0, 1):
                 return False, f"变量 {var} 的值 {val} 不是二进制"
@@ -118,19 +161,23 @@ class ProofVerifier:
     def _verify_semantics(self, axioms: List[Expr], goal: Expr,
                           assignment: Dict[str, int]) -> Tuple[bool, str]:
         """语义验证"""
-        # 提取命题变量赋值
-        prop_assignment: Dict[str, bool] = {}
+        # 将命题变量赋值打包为位掩码：mask 记录真值，known 记录已赋值的变量
+        mask = 0
+        known = 0
         for var, val in assignment.items():
-            if len(var) == 1 and var.isupper():
-                prop_assignment[var] = bool(val)
+            bit = _PROP_BITS.get(var)
+            if bit is not None:
+                known |= 1 << bit
+                if val:
+                    mask |= 1 << bit
         
-        if not prop_assignment:
+        if not known:
             return True, "无命题变量需验证"
         
         # 验证公理
         for i, axiom in enumerate(axioms):
             try:
-                val = evaluate(axiom, prop_assignment)
+                val = _evaluate_prop_mask(axiom, mask, known)
                 if not val:
                     return False, f"公理 {i+1} ({axiom}) 在给定赋值下为假"
             except KeyError as e:
@@ -139,7 +186,7 @@ class ProofVerifier:
         
         # 验证目标
         try:
-            goal_val = evaluate(goal, prop_assignment)
+            goal_val = _evaluate_prop_mask(goal, mask, known)
             if not goal_val:
                 return False, f"目标 ({goal}) 在给定赋值下为假"
         except KeyError:
@@ -149,7 +196,16 @@ class ProofVerifier:
     
     def _verify_entailment(self, axioms: List[Expr], goal: Expr) -> Tuple[bool, str]:
         """蕴涵验证"""
-        if entails(axioms, goal):
+        # 平凡情形：目标本身就是公理
+        if any(goal == a for a in axioms):
+            return True, "目标在公理中"
+        
+        # 一步 MP：存在公理 P -> goal 且 P 也是公理
+        for a in axioms:
+            if isinstance(a, Imply) and a.right == goal and a.left in axioms:
+                return True, "公理蕴涵目标"
+        
+        if _entails_cached(frozenset(axioms), goal):
             return True, "公理蕴涵目标"
         return False, "公理不蕴涵目标（可能需要更多推理步骤）"
     
@@ -168,12 +224,14 @@ class ProofVerifier:
         Returns:
             验证结果
         """
-        proven: List[Expr] = list(axioms)
+        proven_list: List[Expr] = list(axioms)
+        proven_set = set(axioms)   # 用于 O(1) 的目标成员判断
         
         for i, (rule_name, conclusion, premise_indices) in enumerate(steps):
             # 检查前提是否已证明
+            n = len(proven_list)
             for idx in premise_indices:
-                if idx < 0 or idx >= len(proven):
+                if idx < 0 or idx >= n:
                     return VerificationResult(
                         status=VerificationStatus.INVALID,
                         message=f"步骤 {i+1}: 前提 {idx} 不存在"
@@ -181,10 +239,11 @@ class ProofVerifier:
             
             # 验证规则应用
             # （简化处理：信任规则名称）
-            proven.append(conclusion)
+            proven_list.append(conclusion)
+            proven_set.add(conclusion)
         
         # 检查目标是否被证明
-        if goal in proven:
+        if goal in proven_set:
             return VerificationResult(
                 status=VerificationStatus.VALID,
                 message="逐步证明有效"
@@ -209,8 +268,8 @@ def quick_verify(axiom_strs: List[str], goal_str: str,
     Returns:
         是否有效
     """
-    axioms = [parse(s) for s in axiom_strs]
-    goal = parse(goal_str)
+    axioms = [_parse_cached(s) for s in axiom_strs]
+    goal = _parse_cached(goal_str)
     
     verifier = ProofVerifier(strict=False)
     result = verifier.verify(axioms, goal, assignment)
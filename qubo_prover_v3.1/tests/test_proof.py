@@ -9,7 +9,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from qubo_prover.logic.parser import parse
-from qubo_prover.logic.evaluator import entails
+from qubo_prover.logic.evaluator import entails, evaluate, evaluate_mask, all_assignments
 from qubo_prover.proof.rules import (
     ModusPonens, ModusTollens, AndIntro, AndElimLeft, AndElimRight,
     OrIntroLeft, OrElim, DoubleNegElim, apply_all_rules
@@ -172,6 +172,18 @@ class TestSemanticEntailment:
         goal = parse("R")
         
         assert entails(axioms, goal)
+    
+    def test_evaluate_mask_matches_evaluate(self):
+        """测试位掩码求值与字典求值一致"""
+        expr = parse("(P -> Q) & (~R | P)")
+        var_to_bit = {"P": 0, "Q": 1, "R": 2}
+        
+        for assignment in all_assignments({"P", "Q", "R"}):
+            mask = sum(1 << var_to_bit[v] for v, val in assignment.items() if val)
+            assert evaluate_mask(expr, mask, var_to_bit) == evaluate(expr, assignment)
+        
+        with pytest.raises(KeyError):
+            evaluate_mask(expr, 0b011, var_to_bit, known=0b011)
 
 
 if __name__ == "__main__":
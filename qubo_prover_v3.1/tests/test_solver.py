@@ -0,0 +1,134 @@
+"""
+求解器层测试
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from qubo_prover.solver.backends import NealBackend
+from qubo_prover.solver.decoder import DecodedResult, decode_result, verify_proof
+from qubo_prover.solver.verifier import ProofVerifier
+from qubo_prover.qubo.builder import build_qubo
+
+
+class TestSampleResult:
+    """采样结果测试"""
+    
+    def test_neal_samples_view(self):
+        """测试 Neal 后端的 samples 与 sample_at 一致"""
+        problem = build_qubo(["P", "P -> Q"], "Q", verbose=False)
+        result = NealBackend(seed=0).sample(problem.bqm, num_reads=10)
+        
+        assert len(result.samples) == result.num_rows > 0
+        assert result.samples[0] == result.sample_at(0)
+        assert list(result.samples)[-1] == result.sample_at(result.num_rows - 1)
+    
+    def test_neal_aggregated_rows(self):
+        """测试 Neal 后端合并重复样本后的行数与总样本数"""
+        problem = build_qubo(["P", "P -> Q"], "Q", verbose=False)
+        result = NealBackend(seed=0).sample(problem.bqm, num_reads=20)
+        
+        assert len(result.energies) == result.num_rows <= result.num_reads
+        assert result.num_samples == result.num_reads == 20
+    
+    def test_matrix_samples_slice(self):
+        """测试样本矩阵视图的切片"""
+        from qubo_prover.solver.backends import _MatrixSamples
+        samples = _MatrixSamples(np.array([[0, 1], [1, 0]], dtype=np.int8), {"P": 0, "Q": 1})
+        
+        assert samples[:] == [{"P": 0, "Q": 1}, {"P": 1, "Q": 0}]
+        assert samples[-1] == {"P": 1, "Q": 0}
+
+
+class TestDecodedResult:
+    """解码结果测试"""
+    
+    def test_explicit_details(self):
+        """测试构造时显式传入 details"""
+        decoded = DecodedResult({}, 0.0, True, True, True, True, "ok", details={"source": "test"})
+        
+        assert decoded.details == {"source": "test"}
+    
+    def test_default_details(self):
+        """测试未传入 details 时为 None"""
+        decoded = DecodedResult({}, 0.0, True, True, True, True, "ok")
+        
+        assert decoded.details is None
+    
+    def test_lazy_details(self):
+        """测试 decode_result 的 details 按需组装"""
+        problem = build_qubo(["P", "P -> Q"], "Q", verbose=False)
+        result = NealBackend(seed=0).sample(problem.bqm, num_reads=10)
+        decoded = decode_result(result, problem)
+        
+        assert decoded.details["num_samples"] == result.num_samples
+        assert decoded.details is decoded.details
+
+
+class TestVerifyProof:
+    """证明语义验证测试"""
+    
+    def test_axiom_violated(self):
+        """测试违反公理的赋值被拒绝"""
+        problem = build_qubo(["P", "P -> Q"], "Q", verbose=False)
+        decoded = DecodedResult({"P": 1, "Q": 0}, 0.0, True, True, True, True, "ok")
+        
+        ok, msg = verify_proof(decoded, problem)
+        
+        assert not ok
+        assert "P -> Q" in msg
+    
+    def test_axioms_satisfied(self):
+        """测试满足全部公理的赋值通过验证"""
+        problem = build_qubo(["P", "P -> Q"], "Q", verbose=False)
+        decoded = DecodedResult({"P": 1, "Q": 1}, 0.0, True, True, True, True, "ok")
+        
+        ok, msg = verify_proof(decoded, problem)
+        
+        assert ok
+        assert msg == "证明验证通过"
+
+
+class TestProofVerifier:
+    """证明验证器测试"""
+    
+    def test_syntax_non_binary(self):
+        """测试非二进制取值"""
+        ok, msg = ProofVerifier()._verify_syntax({"P": 1, "Q": 2})
+        
+        assert not ok
+        assert msg == "变量 Q 的值 2 不是二进制"
+    
+    def test_syntax_non_numeric(self):
+        """测试无法转换为数值的取值"""
+        ok, msg = ProofVerifier()._verify_syntax({"P": 1, "Q": "x"})
+        
+        assert not ok
+        assert msg == "变量 Q 的值 x 不是二进制"
+    
+    def test_syntax_numeric_string(self):
+        """测试数字字符串不被当作二进制取值"""
+        ok, msg = ProofVerifier()._verify_syntax({"P": "1"})
+        
+        assert not ok
+        assert msg == "变量 P 的值 1 不是二进制"
+    
+    def test_syntax_out_of_range(self):
+        """测试超出 int8 范围的整数"""
+        ok, msg = ProofVerifier()._verify_syntax({"P": 257})
+        
+        assert not ok
+        assert msg == "变量 P 的值 257 不是二进制"
+    
+    def test_syntax_ok(self):
+        """测试合法的二进制赋值"""
+        assert ProofVerifier()._verify_syntax({"P": 1, "Q": 0}) == (True, "格式正确")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -10,13 +10,15 @@
 """
 
 import argparse
+import heapq
 import sys
 import os
-from typing import List
+from typing import List, Optional
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from qubo_prover_v3.core.parser import parse
 from qubo_prover_v3.core.qubo_builder import QUBOBuilder
 from qubo_prover_v3.neural.neural_guided_builder import NeuralGuidedQUBOBuilder
 from qubo_prover_v3.core.sampler import make_backend, NealBackend
@@ -30,8 +32,8 @@ from qubo_prover_v3.core.decoder import (
 )
 
 
-def main():
-    """主函数"""
+def _build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
     parser = argparse.ArgumentParser(
         description='QUBO 命题逻辑自动定理证明器 V3 - 神经引导版本',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -89,7 +91,24 @@ def main():
     parser.add_argument('--show-qubo', action='store_true',
                         help='显示完整的 QUBO 方程')
 
-    args = parser.parse_args()
+    return parser
+
+
+# 解析器只在导入时构建一次，main() 重复调用时直接复用
+_PARSER = _build_parser()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    主函数
+
+    Args:
+        argv: 命令行参数列表（不含程序名）；None 表示读取 sys.argv
+
+    Returns:
+        退出码：0 证明成功，1 证明失败或输入无效，2 运行出错
+    """
+    args = _PARSER.parse_args(argv)
 
     # 解析公理
     axioms: List[str] = [ax.strip() for ax in args.axioms.split(';') if ax.strip()]
@@ -116,6 +135,9 @@ def main():
     print()
 
     try:
+        # 0. 去除重复公理（AST 已驻留，结构相同即为同一对象）
+        axioms = _dedup_axioms(axioms)
+
         # 1. 构建 QUBO
         if args.use_neural:
             print("[神经引导模式]")
@@ -221,46 +243,68 @@ def main():
         return 2
 
 
+def _dedup_axioms(axioms: List[str]) -> List[str]:
+    """
+    按解析后的 AST 去除重复公理，保留首次出现的写法
+
+    Args:
+        axioms: 公理字符串列表
+
+    Returns:
+        去重后的公理字符串列表
+    """
+    seen = set()
+    unique: List[str] = []
+    for ax in axioms:
+        key = id(parse(ax))
+        if key not in seen:
+            seen.add(key)
+            unique.append(ax)
+    if len(unique) < len(axioms):
+        print(f"已去除 {len(axioms) - len(unique)} 个重复公理: {unique}")
+    return unique
+
+
 def _display_qubo_equation(qubo: dict, offset: float):
     """显示完整的 QUBO 方程"""
     print("能量函数 E(x) = Σ Q_ij * x_i * x_j + offset")
     print()
     print("其中:")
 
-    # 分类显示
-    linear_terms = []
-    quadratic_terms = []
-
-    for (i, j), coeff in sorted(qubo.items()):
-        if i == j:
-            linear_terms.append((i, coeff))
-        else:
-            quadratic_terms.append((i, j, coeff))
+    # 分类显示：只取按变量名排序的前10项，无需对整个 QUBO 排序
+    n_linear = sum(1 for i, j in qubo if i == j)
+    n_quadratic = len(qubo) - n_linear
+    linear_head = heapq.nsmallest(
+        10, ((i, coeff) for (i, j), coeff in qubo.items() if i == j),
+        key=lambda t: t[0])
+    quadratic_head = heapq.nsmallest(
+        10, ((i, j, coeff) for (i, j), coeff in qubo.items() if i != j),
+        key=lambda t: (t[0], t[1]))
 
     # 显示线性项
-    if linear_terms:
+    if linear_head:
         print("  线性项（一次项）:")
-        for var, coeff in linear_terms[:10]:  # 只显示前10个
+        for var, coeff in linear_head:  # 只显示前10个
             sign = "+" if coeff >= 0 else ""
             print(f"    {sign}{coeff:.1f} * {var}")
-        if len(linear_terms) > 10:
-            print(f"    ... 还有 {len(linear_terms) - 10} 个线性项")
+        if n_linear > 10:
+            print(f"    ... 还有 {n_linear - 10} 个线性项")
 
     # 显示二次项
-    if quadratic_terms:
+    if quadratic_head:
         print()
         print("  二次项（交叉项）:")
-        for var1, var2, coeff in quadratic_terms[:10]:  # 只显示前10个
+        for var1, var2, coeff in quadratic_head:  # 只显示前10个
             sign = "+" if coeff >= 0 else ""
             print(f"    {sign}{coeff:.1f} * {var1} * {var2}")
-        if len(quadratic_terms) > 10:
-            print(f"    ... 还有 {len(quadratic_terms) - 10} 个二次项")
+        if n_quadratic > 10:
+            print(f"    ... 还有 {n_quadratic - 10} 个二次项")
 
     # 显示常数项
     print()
     print(f"  常数项（offset）: {offset:.1f}")
     print()
-    print(f"总计: {len(linear_terms)} 个线性项 + {len(quadratic_terms)} 个二次项")
+    print(f"总计: {n_linear} 个线性项 + {n_quadratic} 个二次项")
     print("=" * 70)
 
 
@@ -4,17 +4,66 @@
 """
 
 from dataclasses import dataclass
-from typing import Union
+from typing import Tuple, Union
+from weakref import WeakValueDictionary
+
+
+# 驻留表：(类型, 字段...) -> 节点。子节点已驻留，因此以 id 作为键即可；
+# 父节点存活时会持有子节点的引用，键中的 id 不会被复用。
+_INTERN: "WeakValueDictionary[tuple, Sentence]" = WeakValueDictionary()
+
+
+def _intern_key(cls: type, args: Tuple) -> tuple:
+    """计算驻留键"""
+    return (cls,) + tuple(id(a) if isinstance(a, Sentence) else a for a in args)
 
 
 class Sentence:
-    """所有逻辑公式的基类"""
-    pass
+    """
+    所有逻辑公式的基类
+    
+    结构相同的节点会被驻留为同一个对象，下游可以直接以 id() 作为缓存键。
+    子类通过 __slots__ 声明字段，节点不带 __dict__（保留 __weakref__ 供驻留表使用）。
+    """
+    
+    __slots__ = ("__weakref__",)
+    
+    def __new__(cls, *args, **kwargs):
+        if kwargs or not args:
+            # 关键字参数构造或 pickle/copy 复原时不做驻留
+            return super().__new__(cls)
+        key = _intern_key(cls, args)
+        node = _INTERN.get(key)
+        if node is None:
+            node = super().__new__(cls)
+            _INTERN[key] = node
+        return node
+    
+    @classmethod
+    def intern(cls, *args):
+        """
+        获取驻留节点（命中时跳过 __init__）
+        
+        Args:
+            *args: 节点字段（按位置）
+            
+        Returns:
+            结构相同的共享节点
+        """
+        node = _INTERN.get(_intern_key(cls, args))
+        if node is None:
+            node = cls(*args)
+        return node
+    
+    def __reduce__(self):
+        # 冻结 + __slots__ 的实例无法按默认方式恢复状态；改为重新构造，顺带恢复驻留
+        return (type(self), tuple(getattr(self, f) for f in self.__slots__))
 
 
 @dataclass(frozen=True)
 class Var(Sentence):
     """命题变量，如 P, Q, R"""
+    __slots__ = ("name",)
     name: str
     
     def __str__(self):
@@ -27,6 +76,7 @@ class Var(Sentence):
 @dataclass(frozen=True)
 class Not(Sentence):
     """否定，如 ~P"""
+    __slots__ = ("operand",)
     operand: Sentence
     
     def __str__(self):
@@ -39,6 +89,7 @@ class Not(Sentence):
 @dataclass(frozen=True)
 class And(Sentence):
     """合取，如 P & Q"""
+    __slots__ = ("left", "right")
     left: Sentence
     right: Sentence
     
@@ -52,6 +103,7 @@ class And(Sentence):
 @dataclass(frozen=True)
 class Or(Sentence):
     """析取，如 P | Q"""
+    __slots__ = ("left", "right")
     left: Sentence
     right: Sentence
     
@@ -65,6 +117,7 @@ class Or(Sentence):
 @dataclass(frozen=True)
 class Imply(Sentence):
     """蕴涵，如 P -> Q"""
+    __slots__ = ("left", "right")
     left: Sentence
     right: Sentence
     
@@ -89,14 +142,19 @@ def get_all_vars(expr: Expr) -> set[str]:
     Returns:
         所有变量名的集合
     """
-    if isinstance(expr, Var):
-        return {expr.name}
-    elif isinstance(expr, Not):
-        return get_all_vars(expr.operand)
-    elif isinstance(expr, (And, Or, Imply)):
-        return get_all_vars(expr.left) | get_all_vars(expr.right)
-    else:
-        return set()
+    out = set()
+    stack = [expr]
+    while stack:
+        e = stack.pop()
+        t = type(e)
+        if t is Var:
+            out.add(e.name)
+        elif t is Not:
+            stack.append(e.operand)
+        elif t is And or t is Or or t is Imply:
+            stack.append(e.left)
+            stack.append(e.right)
+    return out
 
 
 def formula_complexity(expr: Expr) -> int:
@@ -109,12 +167,18 @@ def formula_complexity(expr: Expr) -> int:
     Returns:
         公式的节点总数
     """
-    if isinstance(expr, Var):
-        return 1
-    elif isinstance(expr, Not):
-        return 1 + formula_complexity(expr.operand)
-    elif isinstance(expr, (And, Or, Imply)):
-        return 1 + formula_complexity(expr.left) + formula_complexity(expr.right)
-    else:
-        return 0
-
+    count = 0
+    stack = [expr]
+    while stack:
+        e = stack.pop()
+        t = type(e)
+        if t is Var:
+            count += 1
+        elif t is Not:
+            count += 1
+            stack.append(e.operand)
+        elif t is And or t is Or or t is Imply:
+            count += 1
+            stack.append(e.left)
+            stack.append(e.right)
+    return count
@@ -219,38 +219,35 @@ def _display_qubo_equation(qubo: dict, offset: float):
     print()
     print("其中:")
 
-    # 分类显示
-    linear_terms = []
-    quadratic_terms = []
-
-    for (i, j), coeff in sorted(qubo.items()):
-        if i == j:
-            # 线性项
-            linear_terms.append((i, coeff))
-        else:
-            # 二次项
-            quadratic_terms.append((i, j, coeff))
+    # 分类显示：先计数，再按排序后的键流式输出，不另建线性/二次项列表
+    n_linear = sum(1 for i, j in qubo if i == j)
+    n_quadratic = len(qubo) - n_linear
+    keys = sorted(qubo)
 
     # 显示线性项
-    if linear_terms:
+    if n_linear:
         print("  线性项（一次项）:")
-        for var, coeff in linear_terms:
-            sign = "+" if coeff >= 0 else ""
-            print(f"    {sign}{coeff:.1f} * {var}")
+        for i, j in keys:
+            if i == j:
+                coeff = qubo[(i, j)]
+                sign = "+" if coeff >= 0 else ""
+                print(f"    {sign}{coeff:.1f} * {i}")
 
     # 显示二次项
-    if quadratic_terms:
+    if n_quadratic:
         print()
         print("  二次项（交叉项）:")
-        for var1, var2, coeff in quadratic_terms:
-            sign = "+" if coeff >= 0 else ""
-            print(f"    {sign}{coeff:.1f} * {var1} * {var2}")
+        for i, j in keys:
+            if i != j:
+                coeff = qubo[(i, j)]
+                sign = "+" if coeff >= 0 else ""
+                print(f"    {sign}{coeff:.1f} * {i} * {j}")
 
     # 显示常数项
     print()
     print(f"  常数项（offset）: {offset:.1f}")
     print()
-    print(f"总计: {len(linear_terms)} 个线性项 + {len(quadratic_terms)} 个二次项")
+    print(f"总计: {n_linear} 个线性项 + {n_quadratic} 个二次项")
     print("=" * 70)
 
 
@@ -3,11 +3,71 @@
 将逻辑公式转换为 QUBO 变量和约束
 """
 
-from typing import Dict, Tuple, Set
+from collections import defaultdict
+from functools import lru_cache
+from types import MappingProxyType
+from typing import DefaultDict, Dict, FrozenSet, List, Mapping, Optional, Tuple, Set
 from pyqubo import Binary
 from .ast import Expr, Var, Not, And, Or, Imply
 
 
+# 公式 -> 简短字符串（用于变量名）
+_STR_DISPATCH = {
+    Var: lambda e: e.name,
+    Not: lambda e: f"N{_formula_to_str(e.operand)}",
+    And: lambda e: f"{_formula_to_str(e.left)}A{_formula_to_str(e.right)}",
+    Or: lambda e: f"{_formula_to_str(e.left)}O{_formula_to_str(e.right)}",
+    Imply: lambda e: f"{_formula_to_str(e.left)}I{_formula_to_str(e.right)}",
+}
+
+# 复合公式 -> 变量名主体（不含前缀）
+_NAME_DISPATCH = {
+    Not: lambda e: f"Not_{_formula_to_str(e.operand)}",
+    And: lambda e: f"And_{_formula_to_str(e.left)}_{_formula_to_str(e.right)}",
+    Or: lambda e: f"Or_{_formula_to_str(e.left)}_{_formula_to_str(e.right)}",
+    Imply: lambda e: f"Imp_{_formula_to_str(e.left)}_{_formula_to_str(e.right)}",
+}
+
+
+@lru_cache(maxsize=4096)
+def _formula_to_str(formula: Expr) -> str:
+    """将公式转换为简短字符串（用于变量名）"""
+    fn = _STR_DISPATCH.get(type(formula))
+    return fn(formula) if fn else "?"
+
+
+@lru_cache(maxsize=4096)
+def _generate_var_name(formula: Expr, prefix: str) -> str:
+    """生成公式的变量名"""
+    fn = _NAME_DISPATCH.get(type(formula))
+    if fn is None:
+        return "Unknown"
+    return f"{prefix}{fn(formula)}"
+
+
+@lru_cache(maxsize=None)
+def _binary(name: str) -> Binary:
+    """按名称共享 PyQUBO Binary 对象（变量名全局唯一，可跨编码器复用）"""
+    return Binary(name)
+
+
+# 结构约束类型 -> PyQUBO 惩罚表达式（参数依次为约束条目中各变量的 Binary），
+# 仅在 get_constraints 中按需构建；QUBO 系数由 _encode_* 直接写入 self.qubo
+_CONSTRAINT_EXPRS = {
+    "NOT": lambda v, o: 1 - v - o + 2 * v * o,
+    "AND": lambda v, l, r: l * r - 2 * (l + r) * v + 3 * v,
+    "OR": lambda v, l, r: l + r + v + l * r - 2 * l * v - 2 * r * v,
+    "IMPLY": lambda v, l, r: 1 - l + 2 * r - v - l * r + 2 * l * v - 2 * r * v,
+}
+
+
+def clear_name_caches():
+    """清空变量名与 Binary 缓存（由 QUBOBuilder.build 在每次构建前调用以限制内存）"""
+    _formula_to_str.cache_clear()
+    _generate_var_name.cache_clear()
+    _binary.cache_clear()
+
+
 class FormulaEncoder:
     """
     将逻辑公式编码为 QUBO 变量
@@ -21,8 +81,15 @@ class FormulaEncoder:
     def __init__(self):
         self.var_map: Dict[str, Binary] = {}  # 变量名 -> PyQUBO Binary
         self.formula_map: Dict[str, Expr] = {}  # 变量名 -> 原始公式
-        self.constraints = []  # 结构约束列表
+        self.constraints = []  # 结构约束列表：(类型, 变量名, 子公式变量名...)
+        self.var_ids: Dict[str, int] = {}  # 变量名 -> 整数编号（按创建顺序）
+        self.var_names: List[str] = []  # 整数编号 -> 变量名
+        self.qubo: DefaultDict[Tuple[int, int], float] = defaultdict(float)  # 结构约束的 QUBO 系数（按编号）
+        self.offset: float = 0.0  # 结构约束的常数项
         self.prop_vars: Set[str] = set()  # 命题变量集合
+        self._seen: Dict[Tuple[int, str], Tuple[Expr, str, Binary, int]] = {}  # (id(公式), 前缀) -> 编码结果
+        self._constraints_view: Optional[Tuple] = None  # get_constraints 的只读快照
+        self._prop_vars_view: Optional[FrozenSet[str]] = None  # get_prop_vars 的只读快照
         
     def encode_formula(self, formula: Expr, name_prefix: str = "") -> Tuple[str, Binary]:
         """
@@ -35,136 +102,188 @@ class FormulaEncoder:
         Returns:
             (变量名, PyQUBO Binary 对象)
         """
+        _, var_name, var, _ = self._encode(formula, name_prefix)
+        return var_name, var
+    
+    def _encode(self, formula: Expr, name_prefix: str) -> Tuple[Expr, str, Binary, int]:
+        """编码公式，返回 (公式, 变量名, Binary, 整数编号)"""
+        # AST 节点已驻留，同一子公式直接按 id 命中，跳过变量名的递归构造；
+        # 命题变量的名称与前缀无关，不同公理中的同一变量共用一个缓存项
+        key = (id(formula), "" if type(formula) is Var else name_prefix)
+        seen = self._seen.get(key)
+        if seen is not None and seen[0] is formula:
+            return seen
+        
+        seen = (formula,) + self._encode_new(formula, name_prefix)
+        self._seen[key] = seen
+        return seen
+    
+    def _new_var(self, var_name: str, formula: Expr) -> Tuple[Binary, int]:
+        """登记新变量并分配整数编号"""
+        var = _binary(var_name)
+        vid = len(self.var_names)
+        self.var_map[var_name] = var
+        self.formula_map[var_name] = formula
+        self.var_ids[var_name] = vid
+        self.var_names.append(var_name)
+        return var, vid
+    
+    def _encode_new(self, formula: Expr, name_prefix: str) -> Tuple[str, Binary, int]:
+        """编码尚未命中缓存的公式"""
         # 如果是简单变量，直接返回
-        if isinstance(formula, Var):
+        if type(formula) is Var:
             var_name = formula.name
-            self.prop_vars.add(var_name)
+            if var_name not in self.prop_vars:
+                self.prop_vars.add(var_name)
+                self._prop_vars_view = None
             if var_name not in self.var_map:
-                self.var_map[var_name] = Binary(var_name)
-                self.formula_map[var_name] = formula
-            return var_name, self.var_map[var_name]
+                self._new_var(var_name, formula)
+            return var_name, self.var_map[var_name], self.var_ids[var_name]
         
         # 为复合公式生成唯一变量名
-        var_name = self._generate_var_name(formula, name_prefix)
+        var_name = _generate_var_name(formula, name_prefix)
         
         if var_name in self.var_map:
-            return var_name, self.var_map[var_name]
+            return var_name, self.var_map[var_name], self.var_ids[var_name]
         
         # 创建新变量
-        var = Binary(var_name)
-        self.var_map[var_name] = var
-        self.formula_map[var_name] = formula
+        var, vid = self._new_var(var_name, formula)
         
         # 递归编码子公式并添加结构约束
-        if isinstance(formula, Not):
-            self._encode_not(var_name, var, formula)
-        elif isinstance(formula, And):
-            self._encode_and(var_name, var, formula, name_prefix)
-        elif isinstance(formula, Or):
-            self._encode_or(var_name, var, formula, name_prefix)
-        elif isinstance(formula, Imply):
-            self._encode_imply(var_name, var, formula, name_prefix)
+        encode = self._STRUCTURE_ENCODERS.get(type(formula))
+        if encode is not None:
+            encode(self, var_name, var, vid, formula, name_prefix)
         
-        return var_name, var
+        return var_name, var, vid
     
-    def _generate_var_name(self, formula: Expr, prefix: str) -> str:
-        """生成公式的变量名"""
-        if isinstance(formula, Not):
-            operand_str = self._formula_to_str(formula.operand)
-            return f"{prefix}Not_{operand_str}" if prefix else f"Not_{operand_str}"
-        elif isinstance(formula, And):
-            left_str = self._formula_to_str(formula.left)
-            right_str = self._formula_to_str(formula.right)
-            return f"{prefix}And_{left_str}_{right_str}" if prefix else f"And_{left_str}_{right_str}"
-        elif isinstance(formula, Or):
-            left_str = self._formula_to_str(formula.left)
-            right_str = self._formula_to_str(formula.right)
-            return f"{prefix}Or_{left_str}_{right_str}" if prefix else f"Or_{left_str}_{right_str}"
-        elif isinstance(formula, Imply):
-            left_str = self._formula_to_str(formula.left)
-            right_str = self._formula_to_str(formula.right)
-            return f"{prefix}Imp_{left_str}_{right_str}" if prefix else f"Imp_{left_str}_{right_str}"
-        return "Unknown"
+    def _add_constraint(self, entry: Tuple):
+        """登记一条结构约束（只记录类型与变量名，表达式在 get_constraints 中构建）"""
+        self.constraints.append(entry)
+        self._constraints_view = None
+    
+    def _add_term(self, i: int, j: int, coeff: float):
+        """按变量编号累加一个 QUBO 系数（键为有序编号对，i == j 为线性项）"""
+        key = (i, j) if i <= j else (j, i)
+        self.qubo[key] += coeff
     
-    def _formula_to_str(self, formula: Expr) -> str:
-        """将公式转换为简短字符串（用于变量名）"""
-        if isinstance(formula, Var):
-            return formula.name
-        elif isinstance(formula, Not):
-            return f"N{self._formula_to_str(formula.operand)}"
-        elif isinstance(formula, And):
-            return f"{self._formula_to_str(formula.left)}A{self._formula_to_str(formula.right)}"
-        elif isinstance(formula, Or):
-            return f"{self._formula_to_str(formula.left)}O{self._formula_to_str(formula.right)}"
-        elif isinstance(formula, Imply):
-            return f"{self._formula_to_str(formula.left)}I{self._formula_to_str(formula.right)}"
-        return "?"
-    
-    def _encode_not(self, var_name: str, var: Binary, formula: Not):
+    def _encode_not(self, var_name: str, var: Binary, vid: int, formula: Not, prefix: str = ""):
         """
         编码否定：~P
         约束：Not_P = 1 - P
         等价于：Not_P + P = 1
-        QUBO 惩罚：M * (Not_P + P - 1)^2
+        QUBO 惩罚：M * (Not_P + P - 1)^2 = M * (1 - Not_P - P + 2*Not_P*P)
         """
-        operand_name, operand_var = self.encode_formula(formula.operand)
+        _, operand_name, _, oid = self._encode(formula.operand, "")
         
         # 约束：var = 1 - operand_var
-        # 展开 (var + operand_var - 1)^2
-        constraint = (var + operand_var - 1) ** 2
-        self.constraints.append(("NOT", var_name, operand_name, constraint))
+        # 展开 (var + operand_var - 1)^2（利用 x^2 = x）
+        self._add_term(vid, vid, -1.0)
+        self._add_term(oid, oid, -1.0)
+        self._add_term(vid, oid, 2.0)
+        self.offset += 1.0
+        
+        self._add_constraint(("NOT", var_name, operand_name))
     
-    def _encode_and(self, var_name: str, var: Binary, formula: And, prefix: str):
+    def _encode_and(self, var_name: str, var: Binary, vid: int, formula: And, prefix: str):
         """
         编码合取：P & Q
         约束：And = P * Q
-        QUBO 惩罚：M * (And - P*Q)^2
+        QUBO 惩罚：M * (P*Q - 2*(P + Q)*And + 3*And)
+        
+        (And - P*Q)^2 展开后含三次项 And*P*Q，这里改用标准的二次 AND 惩罚，
+        仅在 And = P*Q 时取 0，否则至少为 1。
         """
-        left_name, left_var = self.encode_formula(formula.left, prefix)
-        right_name, right_var = self.encode_formula(formula.right, prefix)
+        _, left_name, _, lid = self._encode(formula.left, prefix)
+        _, right_name, _, rid = self._encode(formula.right, prefix)
+        
+        self._add_term(lid, rid, 1.0)
+        self._add_term(lid, vid, -2.0)
+        self._add_term(rid, vid, -2.0)
+        self._add_term(vid, vid, 3.0)
         
-        # 约束：var = left_var * right_var
-        # 展开 (var - left_var * right_var)^2
-        constraint = (var - left_var * right_var) ** 2
-        self.constraints.append(("AND", var_name, left_name, right_name, constraint))
+        self._add_constraint(("AND", var_name, left_name, right_name))
     
-    def _encode_or(self, var_name: str, var: Binary, formula: Or, prefix: str):
+    def _encode_or(self, var_name: str, var: Binary, vid: int, formula: Or, prefix: str):
         """
         编码析取：P | Q
         约束：Or = P + Q - P*Q (至少一个为真)
-        QUBO 惩罚：M * (Or - P - Q + P*Q)^2
+        QUBO 惩罚：M * (P + Q + Or + P*Q - 2*P*Or - 2*Q*Or)
+        
+        由 AND 惩罚经德摩根律（Or = 1 - (1-P)(1-Q)）代换得到，仅含二次项。
         """
-        left_name, left_var = self.encode_formula(formula.left, prefix)
-        right_name, right_var = self.encode_formula(formula.right, prefix)
+        _, left_name, _, lid = self._encode(formula.left, prefix)
+        _, right_name, _, rid = self._encode(formula.right, prefix)
+        
+        self._add_term(lid, lid, 1.0)
+        self._add_term(rid, rid, 1.0)
+        self._add_term(vid, vid, 1.0)
+        self._add_term(lid, rid, 1.0)
+        self._add_term(lid, vid, -2.0)
+        self._add_term(rid, vid, -2.0)
         
-        # 约束：var = left_var + right_var - left_var * right_var
-        constraint = (var - left_var - right_var + left_var * right_var) ** 2
-        self.constraints.append(("OR", var_name, left_name, right_name, constraint))
+        self._add_constraint(("OR", var_name, left_name, right_name))
     
-    def _encode_imply(self, var_name: str, var: Binary, formula: Imply, prefix: str):
+    def _encode_imply(self, var_name: str, var: Binary, vid: int, formula: Imply, prefix: str):
         """
         编码蕴涵：P -> Q
         约束：Imp = ~P | Q = 1 - P + P*Q
-        QUBO 惩罚：M * (Imp - 1 + P - P*Q)^2
+        QUBO 惩罚：M * (1 - P + 2*Q - Imp - P*Q + 2*P*Imp - 2*Q*Imp)
+        
+        在 OR 惩罚中以 1 - P 代换 P 得到，仅含二次项。
         """
-        left_name, left_var = self.encode_formula(formula.left, prefix)
-        right_name, right_var = self.encode_formula(formula.right, prefix)
+        _, left_name, _, lid = self._encode(formula.left, prefix)
+        _, right_name, _, rid = self._encode(formula.right, prefix)
         
-        # 约束：var = 1 - left_var + left_var * right_var
-        constraint = (var - 1 + left_var - left_var * right_var) ** 2
-        self.constraints.append(("IMPLY", var_name, left_name, right_name, constraint))
+        self._add_term(lid, lid, -1.0)
+        self._add_term(rid, rid, 2.0)
+        self._add_term(vid, vid, -1.0)
+        self._add_term(lid, rid, -1.0)
+        self._add_term(lid, vid, 2.0)
+        self._add_term(rid, vid, -2.0)
+        self.offset += 1.0
+        
+        self._add_constraint(("IMPLY", var_name, left_name, right_name))
+    
+    # 复合公式类型 -> 结构约束编码函数（否定的操作数不带前缀编码）
+    _STRUCTURE_ENCODERS = {
+        Not: _encode_not,
+        And: _encode_and,
+        Or: _encode_or,
+        Imply: _encode_imply,
+    }
     
-    def get_all_vars(self) -> Dict[str, Binary]:
-        """获取所有 QUBO 变量"""
-        return self.var_map.copy()
+    def get_all_vars(self) -> Mapping[str, Binary]:
+        """获取所有 QUBO 变量（只读视图，随编码器更新）"""
+        return MappingProxyType(self.var_map)
+    
+    def get_constraints(self) -> Tuple:
+        """
+        获取所有结构约束（只读快照，约束不变时重复调用不再重建）
+        
+        每条约束为 (类型, 变量名, 子公式变量名..., PyQUBO 惩罚表达式)，表达式在此按需构建。
+        """
+        if self._constraints_view is None:
+            var_map = self.var_map
+            self._constraints_view = tuple(
+                entry + (_CONSTRAINT_EXPRS[entry[0]](*(var_map[n] for n in entry[1:])),)
+                for entry in self.constraints
+            )
+        return self._constraints_view
     
-    def get_constraints(self) -> list:
-        """获取所有结构约束"""
-        return self.constraints.copy()
+    def get_qubo(self) -> Tuple[Dict[Tuple[str, str], float], float]:
+        """获取结构约束展开后的 QUBO 系数和常数项（未乘惩罚系数，键为按名称排序的变量名对）"""
+        names = self.var_names
+        qubo = {}
+        for (i, j), coeff in self.qubo.items():
+            a, b = names[i], names[j]
+            qubo[(a, b) if a <= b else (b, a)] = coeff
+        return qubo, self.offset
     
-    def get_prop_vars(self) -> Set[str]:
-        """获取所有命题变量（不包括辅助变量）"""
-        return self.prop_vars.copy()
+    def get_prop_vars(self) -> FrozenSet[str]:
+        """获取所有命题变量（不包括辅助变量，只读快照）"""
+        if self._prop_vars_view is None:
+            self._prop_vars_view = frozenset(self.prop_vars)
+        return self._prop_vars_view
     
     def get_var(self, name: str) -> Binary:
         """根据名称获取变量"""
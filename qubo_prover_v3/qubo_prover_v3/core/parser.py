@@ -4,34 +4,97 @@
 """
 
 from __future__ import annotations
+import atexit
+import os
+import pickle
+import re
+import string
+from functools import lru_cache
+from typing import Dict, Optional
 from .ast import Var, Not, And, Or, Imply, Expr
 
 
+# 单次扫描的词法规则：蕴涵、单字符运算符、变量名；其余任意字符单独成 token，交由语法分析报错
+_TOKEN_RE = re.compile(r'->|[~&|()]|[A-Za-z_][A-Za-z0-9_]*|.')
+_NAME_START = frozenset(string.ascii_letters + "_")
+_WS_TRANS = str.maketrans("", "", string.whitespace)
+
+# 磁盘 AST 缓存（仅在设置 QUBO_PROVER_CACHE_DIR 时启用）：公式字符串 -> AST
+_DISK_CACHE_FILE = "ast_cache.pkl"
+_disk_cache: Optional[Dict[str, Expr]] = None
+_disk_cache_dirty = False
+
+
+def _disk_cache_path() -> Optional[str]:
+    """磁盘缓存文件路径；未启用时返回 None"""
+    cache_dir = os.environ.get("QUBO_PROVER_CACHE_DIR")
+    if not cache_dir:
+        return None
+    return os.path.join(os.path.expanduser(cache_dir), _DISK_CACHE_FILE)
+
+
+def _load_disk_cache():
+    """导入时加载磁盘缓存，并注册退出时写回"""
+    global _disk_cache
+    path = _disk_cache_path()
+    if path is None:
+        return
+    _disk_cache = {}
+    try:
+        with open(path, "rb") as f:
+            _disk_cache.update(pickle.load(f))
+    except Exception:
+        # 缓存缺失、损坏或引用了已不存在的模块/类时从空缓存开始
+        _disk_cache = {}
+    atexit.register(_save_disk_cache)
+
+
+def _save_disk_cache():
+    """将新解析的公式写回磁盘缓存（先写临时文件再替换）"""
+    path = _disk_cache_path()
+    if path is None or _disk_cache is None or not _disk_cache_dirty:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(_disk_cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
 class Lexer:
-    """词法分析器"""
+    """词法分析器（预先切分 token，语法分析只移动下标）"""
     
     def __init__(self, s: str):
-        self.s = s.replace(" ", "")  # 移除空格
+        self.s = s.translate(_WS_TRANS)  # 移除所有空白字符
+        self.tokens = _TOKEN_RE.findall(self.s)
         self.i = 0
     
     def peek(self) -> str:
-        """查看当前字符（或双字符运算符）"""
-        if self.s[self.i:self.i+2] == "->":
-            return "->"
-        return self.s[self.i:self.i+1]
+        """查看当前 token（到达末尾时返回空串）"""
+        if self.i < len(self.tokens):
+            return self.tokens[self.i]
+        return ""
     
     def eat(self, t: str) -> bool:
         """尝试消费指定的 token"""
-        if self.s[self.i:].startswith(t):
-            self.i += len(t)
+        if self.i < len(self.tokens) and self.tokens[self.i] == t:
+            self.i += 1
             return True
         return False
     
     def eof(self) -> bool:
         """是否到达输入末尾"""
-        return self.i >= len(self.s)
+        return self.i >= len(self.tokens)
+    
+    def rest(self) -> str:
+        """剩余未消费的输入"""
+        return "".join(self.tokens[self.i:])
 
 
+@lru_cache(maxsize=8192)
 def parse(sentence: str) -> Expr:
     """
     解析命题逻辑公式
@@ -52,11 +115,25 @@ def parse(sentence: str) -> Expr:
         
     Raises:
         ValueError: 解析错误
+    
+    结果按输入字符串缓存（AST 不可变且已驻留，可安全共享）；
+    内存敏感时可调用 parse.cache_clear()。设置环境变量
+    QUBO_PROVER_CACHE_DIR 后，解析结果还会持久化到该目录，跨进程复用。
     """
+    global _disk_cache_dirty
+    if _disk_cache is not None:
+        expr = _disk_cache.get(sentence)
+        if expr is not None:
+            return expr
+    
     lexer = Lexer(sentence)
     expr = _parse_imply(lexer)
     if not lexer.eof():
-        raise ValueError(f"Unexpected input at '{lexer.s[lexer.i:]}' in '{sentence}'")
+        raise ValueError(f"Unexpected input at '{lexer.rest()}' in '{sentence}'")
+    
+    if _disk_cache is not None:
+        _disk_cache[sentence] = expr
+        _disk_cache_dirty = True
     return expr
 
 
@@ -65,7 +142,7 @@ def _parse_imply(lx: Lexer) -> Expr:
     expr = _parse_or(lx)
     while lx.eat("->"):
         right = _parse_or(lx)
-        expr = Imply(expr, right)
+        expr = Imply.intern(expr, right)
     return expr
 
 
@@ -74,7 +151,7 @@ def _parse_or(lx: Lexer) -> Expr:
     expr = _parse_and(lx)
     while lx.eat("|"):
         right = _parse_and(lx)
-        expr = Or(expr, right)
+        expr = Or.intern(expr, right)
     return expr
 
 
@@ -83,14 +160,14 @@ def _parse_and(lx: Lexer) -> Expr:
     expr = _parse_unary(lx)
     while lx.eat("&"):
         right = _parse_unary(lx)
-        expr = And(expr, right)
+        expr = And.intern(expr, right)
     return expr
 
 
 def _parse_unary(lx: Lexer) -> Expr:
     """解析一元运算符（否定）和基本表达式"""
     if lx.eat("~"):
-        return Not(_parse_unary(lx))
+        return Not.intern(_parse_unary(lx))
     if lx.eat("("):
         expr = _parse_imply(lx)
         if not lx.eat(")"):
@@ -98,13 +175,12 @@ def _parse_unary(lx: Lexer) -> Expr:
         return expr
     
     # 解析变量名
-    start = lx.i
-    while not lx.eof() and (lx.peek().isalnum() or lx.peek() == "_"):
-        lx.i += 1
-    
-    if lx.i == start:
-        raise ValueError(f"Expected variable or '(' or '~' at position {lx.i}")
+    tok = lx.peek()
+    if tok[:1] not in _NAME_START:
+        raise ValueError(f"Expected variable or '(' or '~' at token {lx.i}")
     
-    name = lx.s[start:lx.i]
-    return Var(name)
+    lx.i += 1
+    return Var.intern(tok)
+
 
+_load_disk_cache()
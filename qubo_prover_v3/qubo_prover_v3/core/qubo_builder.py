@@ -3,11 +3,34 @@
 根据输入的公理和目标动态生成哈密顿量
 """
 
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Mapping, Tuple, Any
+import dimod
 from pyqubo import Binary, Placeholder
 from .ast import Expr, Var, Not, And, Or, Imply, get_all_vars
 from .parser import parse
-from .formula_encoder import FormulaEncoder
+from .formula_encoder import FormulaEncoder, clear_name_caches
+from .rule_library import COOBuilder, RULE_EMITTERS
+
+
+class QUBOModel:
+    """
+    已展开的 QUBO 模型
+    
+    所有约束在构建时直接展开为 (i, j) -> 系数 的扁平字典，不经过 PyQUBO
+    的符号展开与编译；提供与 PyQUBO Model 相同的 to_qubo / to_bqm 接口。
+    """
+    
+    def __init__(self, qubo: Dict[Tuple[str, str], float], offset: float):
+        self.qubo = qubo
+        self.offset = offset
+    
+    def to_qubo(self) -> Tuple[Dict[Tuple[str, str], float], float]:
+        """返回 (QUBO 字典, offset)"""
+        return dict(self.qubo), self.offset
+    
+    def to_bqm(self) -> Any:
+        """返回 dimod BinaryQuadraticModel"""
+        return dimod.BinaryQuadraticModel.from_qubo(self.qubo, offset=self.offset)
 
 
 class QUBOBuilder:
@@ -45,7 +68,7 @@ class QUBOBuilder:
         self.axiom_vars: List[Tuple[str, Binary]] = []
         self.goal_var: Tuple[str, Binary] = None
         
-    def build(self, axioms: List[str], goal: str) -> Tuple[Any, Dict[str, Binary], float]:
+    def build(self, axioms: List[str], goal: str) -> Tuple[QUBOModel, Mapping[str, Binary], float]:
         """
         构建 QUBO 问题
         
@@ -54,8 +77,11 @@ class QUBOBuilder:
             goal: 目标字符串，如 "Q"
             
         Returns:
-            (PyQUBO Model, 变量映射, offset)
+            (QUBOModel, 变量映射（只读视图）, offset)；常数项已并入 QUBOModel.offset，
+            第三项恒为 0.0
         """
+        clear_name_caches()
+        
         # 1. 解析公理和目标
         self.axioms = [parse(ax) for ax in axioms]
         self.goal = parse(goal)
@@ -75,33 +101,43 @@ class QUBOBuilder:
         self.goal_var = (goal_var_name, goal_var)
         print(f"  目标: {self.goal} -> 变量 {goal_var_name}")
         
-        # 3. 构建哈密顿量
+        # 3. 构建哈密顿量（按变量编号追加到 COO 累加器，最后一次性合并）
         print(f"\n[构建哈密顿量]")
-        H = 0
+        coo = COOBuilder()
+        rule_names: List[str] = []  # 规则控制变量名，编号为 ~k（负数，与编码器编号不冲突）
+        var_ids = self.encoder.var_ids
+        offset = 0.0
         
-        # 3.1 公理约束（强制所有公理为真）
+        # 3.1 公理约束（强制所有公理为真）：A * (1 - v)
         print(f"  添加公理约束（惩罚系数={self.axiom_penalty}）")
         for var_name, var in self.axiom_vars:
-            H += self.axiom_penalty * (1 - var)
+            vid = var_ids[var_name]
+            coo.add(vid, vid, -self.axiom_penalty)
+            offset += self.axiom_penalty
             print(f"    - 强制 {var_name} = 1")
         
         # 3.2 目标约束（强制目标为真）
         print(f"  添加目标约束（惩罚系数={self.axiom_penalty}）")
-        H += self.axiom_penalty * (1 - self.goal_var[1])
-        print(f"    - 强制 {self.goal_var[0]} = 1")
+        goal_name = self.goal_var[0]
+        goal_id = var_ids[goal_name]
+        coo.add(goal_id, goal_id, -self.axiom_penalty)
+        offset += self.axiom_penalty
+        print(f"    - 强制 {goal_name} = 1")
         
         # 3.3 结构约束（确保公式语义一致性）
         print(f"  添加结构约束（惩罚系数={self.structure_penalty}）")
-        constraints = self.encoder.get_constraints()
+        # encoder.constraints 是实时列表，3.4 中的 encode_formula 可能继续追加，这里先记下条数
+        constraints = self.encoder.constraints
+        num_constraints = len(constraints)
         for constraint_info in constraints:
-            constraint_type = constraint_info[0]
-            constraint_expr = constraint_info[-1]
-            H += self.structure_penalty * constraint_expr
-            print(f"    - {constraint_type} 约束")
+            print(f"    - {constraint_info[0]} 约束")
+        for (i, j), coeff in self.encoder.qubo.items():
+            coo.add(i, j, self.structure_penalty * coeff)
+        offset += self.structure_penalty * self.encoder.offset
         
         # 3.4 推理规则约束（可选，用于引导搜索）
         print(f"  添加推理规则约束（惩罚系数={self.rule_penalty}）")
-        H += self._add_rule_constraints()
+        self._add_rule_constraints(coo, rule_names)
         
         # 4. 获取所有变量
         var_map = self.encoder.get_all_vars()
@@ -109,21 +145,33 @@ class QUBOBuilder:
         print(f"\n[统计信息]")
         print(f"  总变量数: {len(var_map)}")
         print(f"  命题变量数: {len(self.encoder.get_prop_vars())}")
-        print(f"  结构约束数: {len(constraints)}")
+        print(f"  结构约束数: {num_constraints}")
         
         # 5. 编译为 QUBO
         print(f"\n[编译 QUBO]")
-        model = H.compile()
+        names = self.encoder.var_names
+        Q: Dict[Tuple[str, str], float] = {}
+        for (i, j), coeff in coo.to_dict().items():
+            a = names[i] if i >= 0 else rule_names[~i]
+            b = names[j] if j >= 0 else rule_names[~j]
+            Q[(a, b) if a <= b else (b, a)] = coeff
+        model = QUBOModel(Q, offset)
         
         return model, var_map, 0.0
     
-    def _add_rule_constraints(self) -> Any:
+    def _add_rule_constraints(self, coo: COOBuilder, rule_names: List[str]):
         """
-        添加推理规则约束
+        添加推理规则约束（追加到 COO 累加器）
         
         当前实现：添加 Modus Ponens 规则作为示例
+        
+        Args:
+            coo: COO 累加器
+            rule_names: 规则控制变量名列表，第 k 个变量的编号为 ~k
         """
-        H_rules = 0
+        var_ids = self.encoder.var_ids
+        rule_ids: Dict[str, int] = {}
+        emit_mp = RULE_EMITTERS["modus_ponens"]
         
         # 尝试匹配 Modus Ponens: P, P->Q ⊢ Q
         # 查找形如 P->Q 的公理
@@ -144,26 +192,22 @@ class QUBOBuilder:
                     q_var_name, q_var = self.encoder.encode_formula(q_formula)
                     
                     # 创建规则控制变量
-                    r_var = Binary(f"Rule_MP_{p_var_name}_{q_var_name}")
+                    r_name = f"Rule_MP_{p_var_name}_{q_var_name}"
                     
-                    # MP 约束
-                    mp_constraint = (
-                        r_var * (1 - p_var) +
-                        r_var * (1 - imp_var) +
-                        r_var * (1 - q_var) +
-                        q_var * (1 - r_var)
-                    )
+                    r_id = rule_ids.get(r_name)
+                    if r_id is None:
+                        r_id = rule_ids[r_name] = ~len(rule_names)
+                        rule_names.append(r_name)
                     
-                    H_rules += mp_constraint
-        
-        return H_rules
+                    # MP 约束：R*(1-P) + R*(1-Imp) + R*(1-Q) + Q*(1-R)，按预展开的系数表写入
+                    emit_mp(coo, var_ids[p_var_name], var_ids[imp_var_name], var_ids[q_var_name], r_id)
     
     def compile_qubo(self, model: Any) -> Tuple[Dict, Any, float]:
         """
-        编译 PyQUBO 模型为 QUBO 矩阵
+        导出模型的 QUBO 矩阵与 BQM
         
         Args:
-            model: PyQUBO 编译后的模型
+            model: build() 返回的 QUBOModel（或 PyQUBO 编译后的模型）
             
         Returns:
             (QUBO 字典, BQM 对象, offset)
@@ -3,13 +3,59 @@
 定义所有支持的逻辑推理规则及其 QUBO 编码
 """
 
-from typing import Dict, List, Tuple, Optional
+import textwrap
+from functools import cache
+from typing import Callable, Dict, List, Tuple, Optional
 from pyqubo import Binary
 from .ast import Expr, Var, Not, And, Or, Imply
 
 
+class COOBuilder:
+    """
+    QUBO 系数的 COO 累加器
+    
+    用三个并列列表 (rows, cols, vals) 追加系数，重复的 (i, j) 在物化时合并，
+    避免逐项构造 PyQUBO 表达式。变量以整数编号表示。
+    """
+    
+    __slots__ = ("rows", "cols", "vals")
+    
+    def __init__(self):
+        self.rows: List[int] = []
+        self.cols: List[int] = []
+        self.vals: List[float] = []
+    
+    def __len__(self) -> int:
+        return len(self.vals)
+    
+    def add(self, i: int, j: int, coeff: float):
+        """追加一个系数（i == j 为线性项）"""
+        self.rows.append(i)
+        self.cols.append(j)
+        self.vals.append(coeff)
+    
+    def to_dict(self) -> Dict[Tuple[int, int], float]:
+        """合并重复项，返回上三角 {(i, j): 系数}（i <= j）"""
+        qubo: Dict[Tuple[int, int], float] = {}
+        for i, j, coeff in zip(self.rows, self.cols, self.vals):
+            key = (i, j) if i <= j else (j, i)
+            qubo[key] = qubo.get(key, 0.0) + coeff
+        return qubo
+
+
 class Rule:
-    """推理规则基类"""
+    """
+    推理规则基类
+    
+    COEFFS 为规则约束展开后的 QUBO 系数表，元素为 (局部变量 i, 局部变量 j, 系数)，
+    局部变量按 encode 的参数顺序编号（控制变量 R 总是最后一个）；i == j 为线性项。
+    VAR_ARITY 为局部变量个数。
+    """
+    
+    __slots__ = ("name", "description")
+    
+    COEFFS: Tuple[Tuple[int, int, int], ...] = ()
+    VAR_ARITY = 0
     
     def __init__(self, name: str, description: str):
         self.name = name
@@ -48,6 +94,12 @@ class ModusPonensRule(Rule):
     从 P 和 P→Q 推出 Q
     """
     
+    __slots__ = ()
+    
+    # 3R + C - RA - RB - 2RC（A, B, C, R = 0, 1, 2, 3）
+    COEFFS = ((3, 3, 3), (2, 2, 1), (3, 0, -1), (3, 1, -1), (3, 2, -2))
+    VAR_ARITY = 4
+    
     def __init__(self):
         super().__init__(
             "Modus Ponens",
@@ -90,6 +142,12 @@ class ModusTollensRule(Rule):
     从 P→Q 和 ~Q 推出 ~P
     """
     
+    __slots__ = ()
+    
+    # 3R + C - RA - RB - 2RC（A, B, C, R = 0, 1, 2, 3）
+    COEFFS = ((3, 3, 3), (2, 2, 1), (3, 0, -1), (3, 1, -1), (3, 2, -2))
+    VAR_ARITY = 4
+    
     def __init__(self):
         super().__init__(
             "Modus Tollens",
@@ -120,6 +178,12 @@ class AndEliminationLeftRule(Rule):
     从 P∧Q 推出 P
     """
     
+    __slots__ = ()
+    
+    # 2R + C - RA - 2RC（A, C, R = 0, 1, 2）
+    COEFFS = ((2, 2, 2), (1, 1, 1), (2, 0, -1), (2, 1, -2))
+    VAR_ARITY = 3
+    
     def __init__(self):
         super().__init__(
             "And-Elimination (Left)",
@@ -149,6 +213,12 @@ class AndEliminationRightRule(Rule):
     从 P∧Q 推出 Q
     """
     
+    __slots__ = ()
+    
+    # 2R + C - RA - 2RC（A, C, R = 0, 1, 2）
+    COEFFS = ((2, 2, 2), (1, 1, 1), (2, 0, -1), (2, 1, -2))
+    VAR_ARITY = 3
+    
     def __init__(self):
         super().__init__(
             "And-Elimination (Right)",
@@ -178,6 +248,12 @@ class AndIntroductionRule(Rule):
     从 P 和 Q 推出 P∧Q
     """
     
+    __slots__ = ()
+    
+    # 3R + C - RA - RB - 2RC（A, B, C, R = 0, 1, 2, 3）
+    COEFFS = ((3, 3, 3), (2, 2, 1), (3, 0, -1), (3, 1, -1), (3, 2, -2))
+    VAR_ARITY = 4
+    
     def __init__(self):
         super().__init__(
             "And-Introduction",
@@ -208,6 +284,12 @@ class OrIntroductionRule(Rule):
     从 P 推出 P∨Q
     """
     
+    __slots__ = ()
+    
+    # 2R + C - RA - 2RC（A, C, R = 0, 1, 2）
+    COEFFS = ((2, 2, 2), (1, 1, 1), (2, 0, -1), (2, 1, -2))
+    VAR_ARITY = 3
+    
     def __init__(self):
         super().__init__(
             "Or-Introduction",
@@ -237,6 +319,12 @@ class DoubleNegationEliminationRule(Rule):
     从 ~~P 推出 P
     """
     
+    __slots__ = ()
+    
+    # 2R + C - RA - 2RC（A, C, R = 0, 1, 2）
+    COEFFS = ((2, 2, 2), (1, 1, 1), (2, 0, -1), (2, 1, -2))
+    VAR_ARITY = 3
+    
     def __init__(self):
         super().__init__(
             "Double Negation Elimination",
@@ -272,8 +360,39 @@ RULE_LIBRARY = {
 }
 
 
+def _compile_emitter(rule_name: str, rule: Rule) -> Callable[..., None]:
+    """
+    为规则生成专用的系数写入函数（运行时代码生成）
+    
+    把 COEFFS 展开为直线代码：一次调用向 COO 累加器的三个列表各追加一个元组，
+    不再逐项遍历系数表。生成的函数签名为 emit_<rule>(coo, a0, ..., a{k-1}, w)，
+    a0.. 为局部变量对应的全局编号（顺序与 encode 一致），w 为惩罚系数。
+    """
+    args = [f"a{i}" for i in range(rule.VAR_ARITY)]
+    rows = ", ".join(f"a{i}" for i, _, _ in rule.COEFFS)
+    cols = ", ".join(f"a{j}" for _, j, _ in rule.COEFFS)
+    vals = ", ".join(f"w * {c}" for _, _, c in rule.COEFFS)
+    func_name = f"emit_{rule_name}"
+    source = textwrap.dedent(f"""\
+        def {func_name}(coo, {", ".join(args)}, w=1.0):
+            coo.rows.extend(({rows},))
+            coo.cols.extend(({cols},))
+            coo.vals.extend(({vals},))
+        """)
+    namespace: Dict[str, Callable[..., None]] = {}
+    exec(compile(source, f"<rule_library:{func_name}>", "exec"), namespace)
+    return namespace[func_name]
+
+
+# 规则名 -> 专用系数写入函数
+RULE_EMITTERS: Dict[str, Callable[..., None]] = {
+    name: _compile_emitter(name, rule) for name, rule in RULE_LIBRARY.items()
+}
+
+
+@cache
 def get_rule(name: str) -> Optional[Rule]:
-    """根据名称获取规则"""
+    """根据名称获取规则（结果按名称缓存）"""
     return RULE_LIBRARY.get(name)
 
 
@@ -3,19 +3,20 @@
 支持多种模拟退火和量子退火采样器
 """
 
-from typing import Any
+from typing import Any, Optional
 
 
 class SamplerBackend:
     """采样器基类"""
     
-    def sample_bqm(self, bqm: Any, num_reads: int):
+    def sample_bqm(self, bqm: Any, num_reads: int, seed: Optional[int] = None):
         """
         对 BQM 进行采样
         
         Args:
             bqm: Binary Quadratic Model
             num_reads: 采样次数
+            seed: 随机种子（None 表示不固定，结果随机）
             
         Returns:
             采样结果
@@ -42,9 +43,9 @@ class NealBackend(SamplerBackend):
                 "Please install it with: pip install dwave-neal"
             )
     
-    def sample_bqm(self, bqm: Any, num_reads: int):
+    def sample_bqm(self, bqm: Any, num_reads: int, seed: Optional[int] = None):
         sampler = self._neal.SimulatedAnnealingSampler()
-        return sampler.sample(bqm, num_reads=num_reads)
+        return sampler.sample(bqm, num_reads=num_reads, seed=seed)
     
     def name(self) -> str:
         return "neal"
@@ -65,11 +66,11 @@ class OpenJijBackend(SamplerBackend):
                 "Please install it with: pip install openjij"
             )
     
-    def sample_bqm(self, bqm: Any, num_reads: int):
+    def sample_bqm(self, bqm: Any, num_reads: int, seed: Optional[int] = None):
         # 转换为 QUBO 格式
         Q = bqm.to_qubo()[0]
         sampler = self._oj.SASampler()
-        return sampler.sample_qubo(Q, num_reads=num_reads)
+        return sampler.sample_qubo(Q, num_reads=num_reads, seed=seed)
     
     def name(self) -> str:
         return "openjij"
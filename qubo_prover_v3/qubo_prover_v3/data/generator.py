@@ -8,10 +8,20 @@
 4. 保存为训练数据
 """
 
+import multiprocessing
 import random
 import json
 import os
-from typing import List, Tuple, Dict
+import re
+from dataclasses import dataclass, field
+from typing import Iterator, List, Tuple, Dict, Optional, Union
+import numpy as np
+
+# orjson 是可选依赖（更快的 JSON 序列化）
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # tqdm 是可选依赖
 try:
@@ -23,6 +33,72 @@ except ImportError:
         return iterable
 
 
+# 模板占位符，例如 {A}
+_PLACEHOLDER_RE = re.compile(r'\{([A-Z])\}')
+
+# 样本数低于该值时生成很快，不显示进度条
+_PROGRESS_MIN_SAMPLES = 1000
+
+# 样本数低于该值时进程启动开销大于收益，始终单进程生成
+_PARALLEL_MIN_SAMPLES = 50000
+
+# 预编码特征 / 标签文件相对于 JSON 数据集路径的后缀
+FEATURES_SUFFIX = ".features.npy"
+LABELS_SUFFIX = ".labels.npy"
+
+
+@dataclass
+class GeneratedDataset:
+    """
+    按列存储的数据集（SoA）：第 i 个样本由各列的第 i 项组成
+    
+    可直接把 axioms / goals 交给 FeatureEncoder.encode_batch；同时兼容旧的
+    按样本访问方式（len、下标、迭代得到 {"axioms", "goal", "useful_rules",
+    "template_name"} 字典）。
+    """
+    
+    axioms: List[List[str]] = field(default_factory=list)
+    goals: List[str] = field(default_factory=list)
+    useful_rules: List[List[str]] = field(default_factory=list)
+    template_names: List[str] = field(default_factory=list)
+    
+    def __len__(self) -> int:
+        return len(self.goals)
+    
+    def __getitem__(self, i: int) -> Dict:
+        return {
+            "axioms": self.axioms[i],
+            "goal": self.goals[i],
+            "useful_rules": self.useful_rules[i],
+            "template_name": self.template_names[i],
+        }
+    
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(len(self)):
+            yield self[i]
+    
+    def extend(self, other: "GeneratedDataset"):
+        """追加另一个数据集的全部样本"""
+        self.axioms.extend(other.axioms)
+        self.goals.extend(other.goals)
+        self.useful_rules.extend(other.useful_rules)
+        self.template_names.extend(other.template_names)
+    
+    def to_records(self) -> List[Dict]:
+        """转换为按样本的字典列表（JSON 格式）"""
+        return list(self)
+    
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> "GeneratedDataset":
+        """从按样本的字典列表构建"""
+        return cls(
+            axioms=[r["axioms"] for r in records],
+            goals=[r["goal"] for r in records],
+            useful_rules=[r["useful_rules"] for r in records],
+            template_names=[r["template_name"] for r in records],
+        )
+
+
 class TrainingDataGenerator:
     """训练数据生成器"""
     
@@ -39,7 +115,8 @@ class TrainingDataGenerator:
         Args:
             seed: 随机种子
         """
-        random.seed(seed)
+        self.seed = seed
+        self._rng = random.Random(seed)  # 独立的随机数生成器，不影响全局 random 状态
         self.templates = self._create_templates()
     
     def _create_templates(self) -> List[Dict]:
@@ -108,6 +185,16 @@ class TrainingDataGenerator:
             },
         ]
         
+        # 预先提取每个模板的占位符（模板不可变，生成问题时直接读取）
+        for template in templates:
+            placeholders = sorted(set(
+                placeholder
+                for formula in template["axioms"] + [template["goal"]]
+                for placeholder in self._extract_placeholders(formula)
+            ))
+            template["_placeholders"] = placeholders
+            template["_num_vars"] = len(placeholders)
+        
         return templates
     
     def generate_problem(self) -> Dict:
@@ -117,30 +204,27 @@ class TrainingDataGenerator:
         Returns:
             问题字典，包含 axioms, goal, useful_rules, template_name
         """
-        # 随机选择一个模板
-        template = random.choice(self.templates)
-        
-        # 随机选择变量
-        num_vars_needed = self._count_unique_vars(template)
-        selected_vars = random.sample(self.VARIABLES, num_vars_needed)
+        # 随机选择一个模板和变量
+        template = self._rng.choice(self.templates)
+        selected_vars = self._rng.sample(self.VARIABLES, template["_num_vars"])
+        return self._instantiate(template, selected_vars)
+    
+    def _instantiate(self, template: Dict, selected_vars: List[str]) -> Dict:
+        """
+        用选定的变量实例化模板
         
-        # 创建变量映射
-        var_mapping = {}
-        var_placeholders = sorted(set(
-            placeholder
-            for axiom in template["axioms"] + [template["goal"]]
-            for placeholder in self._extract_placeholders(axiom)
-        ))
+        Args:
+            template: 问题模板
+            selected_vars: 变量列表，按排序后的占位符依次对应
         
-        for i, placeholder in enumerate(var_placeholders):
-            var_mapping[placeholder] = selected_vars[i]
+        Returns:
+            问题字典
+        """
+        var_mapping = dict(zip(template["_placeholders"], selected_vars))
         
-        # 替换变量
-        axioms = [
-            self._replace_placeholders(axiom, var_mapping)
-            for axiom in template["axioms"]
-        ]
-        goal = self._replace_placeholders(template["goal"], var_mapping)
+        # 替换变量（模板本身就是 str.format 格式，如 "{A}->{B}"）
+        axioms = [axiom.format_map(var_mapping) for axiom in template["axioms"]]
+        goal = template["goal"].format_map(var_mapping)
         
         return {
             "axioms": axioms,
@@ -151,59 +235,172 @@ class TrainingDataGenerator:
     
     def _count_unique_vars(self, template: Dict) -> int:
         """计算模板需要的唯一变量数"""
-        placeholders = set()
-        for axiom in template["axioms"] + [template["goal"]]:
-            placeholders.update(self._extract_placeholders(axiom))
-        return len(placeholders)
+        return template["_num_vars"]
     
     def _extract_placeholders(self, formula: str) -> List[str]:
         """提取公式中的占位符，例如 {A}, {B}"""
-        import re
-        return re.findall(r'\{([A-Z])\}', formula)
+        return _PLACEHOLDER_RE.findall(formula)
     
     def _replace_placeholders(self, formula: str, mapping: Dict[str, str]) -> str:
         """替换占位符为实际变量"""
-        result = formula
-        for placeholder, var in mapping.items():
-            result = result.replace(f"{{{placeholder}}}", var)
-        return result
+        return formula.format_map(mapping)
     
-    def generate_dataset(self, num_samples: int) -> List[Dict]:
+    def generate_dataset(self, num_samples: int, show_progress: bool = True,
+                         num_workers: Optional[int] = 1) -> GeneratedDataset:
         """
         生成数据集
         
         Args:
             num_samples: 样本数量
+            show_progress: 是否显示进度条（少于 _PROGRESS_MIN_SAMPLES 个样本时不显示）
+            num_workers: 并行进程数（None 表示 os.cpu_count()；样本较少时始终单进程）
         
         Returns:
-            数据集列表
+            按列存储的数据集（给定种子与进程数时结果确定）
         """
-        dataset = []
-        
         print(f"生成 {num_samples} 个训练样本...")
-        for _ in tqdm(range(num_samples)):
-            problem = self.generate_problem()
-            dataset.append(problem)
         
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        if num_workers > 1 and num_samples >= _PARALLEL_MIN_SAMPLES:
+            return self._generate_parallel(num_samples, num_workers, show_progress)
+        return self._generate_samples(num_samples, show_progress)
+    
+    def _generate_samples(self, num_samples: int, show_progress: bool = False) -> GeneratedDataset:
+        """
+        在当前进程中生成样本
+        
+        Args:
+            num_samples: 样本数量
+            show_progress: 是否显示进度条
+        
+        Returns:
+            按列存储的数据集
+        """
+        # 一次性抽取所有随机数：模板下标，以及每个样本的一个变量排列（取前 _num_vars 个）
+        template_indices = self._rng.choices(range(len(self.templates)), k=num_samples)
+        np_rng = np.random.default_rng(self._rng.getrandbits(64))
+        perms = np.argsort(np_rng.random((num_samples, len(self.VARIABLES))), axis=1).tolist()
+        
+        samples = range(num_samples)
+        if show_progress and num_samples >= _PROGRESS_MIN_SAMPLES:
+            # 限制刷新频率：约 200 次更新，且间隔不少于 0.5 秒
+            samples = tqdm(samples, miniters=max(1, num_samples // 200), mininterval=0.5)
+        
+        templates = self.templates
+        variables = self.VARIABLES
+        dataset = GeneratedDataset()
+        axioms_col, goals_col = dataset.axioms, dataset.goals
+        for i in samples:
+            template = templates[template_indices[i]]
+            var_mapping = dict(zip(template["_placeholders"], (variables[k] for k in perms[i])))
+            axioms_col.append([axiom.format_map(var_mapping) for axiom in template["axioms"]])
+            goals_col.append(template["goal"].format_map(var_mapping))
+        
+        # 规则与模板名只取决于模板，按下标整列生成
+        dataset.useful_rules = [templates[t]["useful_rules"] for t in template_indices]
+        dataset.template_names = [templates[t]["name"] for t in template_indices]
+        return dataset
+    
+    def _generate_parallel(self, num_samples: int, num_workers: int,
+                           show_progress: bool) -> GeneratedDataset:
+        """
+        多进程生成样本：切分为若干块，每块由子进程用独立种子生成，按块顺序拼接
+        
+        Args:
+            num_samples: 样本数量
+            num_workers: 进程数
+            show_progress: 是否显示进度条（按块计数）
+        
+        Returns:
+            按列存储的数据集
+        """
+        num_chunks = min(num_samples, num_workers * 4)
+        base, extra = divmod(num_samples, num_chunks)
+        # 每块的种子由本生成器的随机数决定，结果与进程调度无关
+        jobs = [(self._rng.getrandbits(32), base + (k < extra)) for k in range(num_chunks)]
+        
+        dataset = GeneratedDataset()
+        with multiprocessing.Pool(num_workers) as pool:
+            chunks = pool.imap(_generate_chunk, jobs)
+            if show_progress:
+                chunks = tqdm(chunks, total=num_chunks)
+            for chunk in chunks:
+                dataset.extend(chunk)
         return dataset
     
-    def save_dataset(self, dataset: List[Dict], output_path: str):
+    def save_dataset(self, dataset: Union[GeneratedDataset, List[Dict]], output_path: str,
+                     save_encoded: bool = False):
         """
-        保存数据集到文件
+        保存数据集到文件（JSON，按样本的字典列表）
         
         Args:
-            dataset: 数据集
+            dataset: 数据集（按列存储或字典列表）
             output_path: 输出文件路径
+            save_encoded: 是否同时保存预编码的特征与标签
+                （output_path + ".features.npy" / ".labels.npy"，训练时可内存映射加载）
         """
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        records = dataset.to_records() if isinstance(dataset, GeneratedDataset) else dataset
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(dataset, f, indent=2, ensure_ascii=False)
+        if save_encoded:
+            columns = dataset if isinstance(dataset, GeneratedDataset) else GeneratedDataset.from_records(dataset)
+            features, labels = encode_dataset(columns)
+            np.save(output_path + FEATURES_SUFFIX, features)
+            np.save(output_path + LABELS_SUFFIX, labels)
+        
+        if orjson is not None:
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(records, option=orjson.OPT_INDENT_2))
+        else:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(records, f, indent=2, ensure_ascii=False)
         
         print(f"数据集已保存到: {output_path}")
         print(f"样本数量: {len(dataset)}")
 
 
+def encode_dataset(dataset: GeneratedDataset,
+                   feature_encoder: Optional["FeatureEncoder"] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    将数据集编码为特征矩阵和多热标签矩阵
+    
+    Args:
+        dataset: 按列存储的数据集
+        feature_encoder: 特征编码器（默认新建一个）
+    
+    Returns:
+        (features, labels)：形状分别为 (N, feature_dim) 与 (N, num_rules) 的 float32 数组，
+        标签列顺序与 RuleSelectorNetwork.RULE_NAMES 一致（未知规则名被忽略）
+    """
+    from ..neural.feature_encoder import FeatureEncoder
+    from ..neural.rule_selector import RuleSelectorNetwork
+    
+    if feature_encoder is None:
+        feature_encoder = FeatureEncoder()
+    features = feature_encoder.encode_batch(dataset.axioms, dataset.goals)
+    
+    rule_to_idx = {name: i for i, name in enumerate(RuleSelectorNetwork.RULE_NAMES)}
+    labels = np.zeros((len(dataset), len(rule_to_idx)), dtype=np.float32)
+    for row, rules in zip(labels, dataset.useful_rules):
+        row[[rule_to_idx[r] for r in rules if r in rule_to_idx]] = 1.0
+    return features, labels
+
+
+def _generate_chunk(job: Tuple[int, int]) -> GeneratedDataset:
+    """
+    子进程入口：用给定种子生成一块样本
+    
+    Args:
+        job: (种子, 样本数量)
+    
+    Returns:
+        按列存储的数据集
+    """
+    seed, num_samples = job
+    return TrainingDataGenerator(seed=seed)._generate_samples(num_samples)
+
+
 # 示例用法
 if __name__ == "__main__":
     generator = TrainingDataGenerator()
@@ -7,11 +7,34 @@
 3. 分析变量数量和复杂度
 """
 
-import re
 from typing import List, Dict
 import numpy as np
 
 
+# 字符类别查找表：字节 -> 类别位
+_LPAREN = 1
+_RPAREN = 2
+_DASH = 4
+_GT = 8
+_NEG = 16
+_CONJ = 32
+_DISJ = 64
+_VAR = 128
+
+_CHAR_CLASS = np.zeros(256, dtype=np.uint8)
+_CHAR_CLASS[ord("(")] = _LPAREN
+_CHAR_CLASS[ord(")")] = _RPAREN
+_CHAR_CLASS[ord("-")] = _DASH
+_CHAR_CLASS[ord(">")] = _GT
+_CHAR_CLASS[ord("~")] = _NEG
+_CHAR_CLASS[ord("&")] = _CONJ
+_CHAR_CLASS[ord("|")] = _DISJ
+_CHAR_CLASS[ord("A"):ord("Z") + 1] = _VAR
+
+# 公式之间的分隔符，不属于任何字符类别
+_SEP = "\n"
+
+
 class FeatureEncoder:
     """特征编码器"""
     
@@ -44,77 +67,96 @@ class FeatureEncoder:
         Returns:
             特征向量，形状为 (feature_dim,)
         """
-        features = []
+        features = np.empty(self.feature_dim, dtype=np.float32)
+        self._encode_into(features, axioms, goal)
+        return features
+    
+    def encode_batch(self, axioms_list: List[List[str]], goals: List[str]) -> np.ndarray:
+        """
+        批量编码多个问题
+        
+        Args:
+            axioms_list: 每个问题的公理列表
+            goals: 每个问题的目标
+        
+        Returns:
+            特征矩阵，形状为 (N, feature_dim)
+        """
+        if len(axioms_list) != len(goals):
+            raise ValueError("axioms_list 与 goals 长度不一致")
+        out = np.empty((len(goals), self.feature_dim), dtype=np.float32)
+        for row, axioms, goal in zip(out, axioms_list, goals):
+            self._encode_into(row, axioms, goal)
+        return out
+    
+    def _encode_into(self, features: np.ndarray, axioms: List[str], goal: str):
+        """
+        将单个问题的特征写入给定的一行
+        
+        Args:
+            features: 输出行，形状为 (feature_dim,)
+            axioms: 公理列表
+            goal: 目标
+        """
+        formulas = axioms + [goal]
+        
+        # 所有公式拼成一个字节缓冲区（每个公式后跟一个分隔符），一次查表得到字符类别
+        text = _SEP.join(formulas) + _SEP
+        buf = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+        cls = _CHAR_CLASS[buf]
+        
+        # 每个公式在缓冲区中的起始位置；目标是最后一个公式
+        seg_lens = np.fromiter((len(f.encode("utf-8")) + 1 for f in formulas),
+                               dtype=np.int64, count=len(formulas))
+        starts = np.concatenate(([0], np.cumsum(seg_lens)[:-1]))
+        goal_start = int(starts[-1])
+        
+        # 运算符：单字符按类别位判断，"->" 需要相邻的 '-' '>'
+        imply = ((cls[:-1] & _DASH) != 0) & ((cls[1:] & _GT) != 0)
+        ax_cls = cls[:goal_start]
+        goal_cls = cls[goal_start:]
         
         # 特征1：公理数量
-        features.append(len(axioms))
+        features[0] = len(axioms)
         
         # 特征2-5：公理中的逻辑运算符
-        axioms_text = " ".join(axioms)
-        features.append(1 if "->" in axioms_text else 0)
-        features.append(1 if "~" in axioms_text else 0)
-        features.append(1 if "&" in axioms_text else 0)
-        features.append(1 if "|" in axioms_text else 0)
+        features[1] = imply[:goal_start].any()
+        features[2] = (ax_cls & _NEG).any()
+        features[3] = (ax_cls & _CONJ).any()
+        features[4] = (ax_cls & _DISJ).any()
         
         # 特征6-9：目标中的逻辑运算符
-        features.append(1 if "->" in goal else 0)
-        features.append(1 if "~" in goal else 0)
-        features.append(1 if "&" in goal else 0)
-        features.append(1 if "|" in goal else 0)
+        features[5] = imply[goal_start:].any()
+        features[6] = (goal_cls & _NEG).any()
+        features[7] = (goal_cls & _CONJ).any()
+        features[8] = (goal_cls & _DISJ).any()
         
         # 特征10：变量数量
-        all_formulas = axioms + [goal]
-        variables = self._extract_variables(all_formulas)
-        features.append(len(variables))
+        features[9] = np.unique(buf[(cls & _VAR) != 0]).size
         
         # 特征11：平均公式长度
-        avg_length = np.mean([len(f) for f in all_formulas])
-        features.append(avg_length)
-        
-        # 特征12：最大公式深度
-        max_depth = max([self._calculate_depth(f) for f in all_formulas])
-        features.append(max_depth)
-        
-        return np.array(features, dtype=np.float32)
-    
-    def _extract_variables(self, formulas: List[str]) -> set:
-        """
-        提取所有变量
-        
-        Args:
-            formulas: 公式列表
+        features[10] = sum(len(f) for f in formulas) / len(formulas)
         
-        Returns:
-            变量集合
-        """
-        variables = set()
-        for formula in formulas:
-            # 匹配大写字母（变量）
-            vars_in_formula = re.findall(r'[A-Z]', formula)
-            variables.update(vars_in_formula)
-        return variables
+        # 特征12：最大公式深度（每个公式单独从 0 计数）
+        features[11] = self._max_depth(cls, starts)
     
-    def _calculate_depth(self, formula: str) -> int:
+    @staticmethod
+    def _max_depth(cls: np.ndarray, starts: np.ndarray) -> int:
         """
-        计算公式的嵌套深度
+        计算各段中括号嵌套深度的最大值
         
         Args:
-            formula: 公式字符串
+            cls: 字符类别数组
+            starts: 各段起始位置（段非空）
         
         Returns:
-            嵌套深度
+            所有段中最大的嵌套深度
         """
-        max_depth = 0
-        current_depth = 0
-        
-        for char in formula:
-            if char == '(':
-                current_depth += 1
-                max_depth = max(max_depth, current_depth)
-            elif char == ')':
-                current_depth -= 1
-        
-        return max_depth
+        delta = ((cls & _LPAREN) != 0).astype(np.int32) - ((cls & _RPAREN) != 0)
+        depth = np.cumsum(delta)
+        seg_max = np.maximum.reduceat(depth, starts)
+        base = np.where(starts > 0, depth[starts - 1], 0)
+        return max(int((seg_max - base).max()), 0)
     
     def get_feature_names(self) -> List[str]:
         """获取特征名称列表"""
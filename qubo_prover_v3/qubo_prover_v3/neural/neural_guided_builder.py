@@ -3,13 +3,20 @@
 结合神经网络预测的规则权重来构建 QUBO 问题
 """
 
-from typing import List, Dict, Tuple, Any, Optional
+import logging
+import warnings
+from functools import lru_cache
+from typing import List, Dict, Mapping, Tuple, Optional
+import numpy as np
 import torch
-from ..core.qubo_builder import QUBOBuilder
+import torch.nn as nn
+from ..core.qubo_builder import QUBOBuilder, QUBOModel
 from .rule_selector import RuleSelectorNetwork
 from .feature_encoder import FeatureEncoder
 
 
+logger = logging.getLogger(__name__)
+
 # 规则名称映射：神经网络名称 -> QUBO 规则库名称
 RULE_NAME_MAPPING = {
     "modus_ponens": "modus_ponens",
@@ -23,6 +30,45 @@ RULE_NAME_MAPPING = {
 }
 
 
+def _build_collapse_plan() -> List[Tuple[str, np.ndarray]]:
+    """
+    构建合并计划：每个 QUBO 规则名及其对应的神经网络输出下标
+    
+    多个神经网络规则映射到同一个 QUBO 规则时取最大值（如 or_intro）。
+    
+    Returns:
+        [(QUBO 规则名, 下标数组), ...]，按神经网络输出中首次出现的顺序排列
+    """
+    plan: Dict[str, List[int]] = {}
+    for i, neural_name in enumerate(RuleSelectorNetwork.RULE_NAMES):
+        qubo_name = RULE_NAME_MAPPING.get(neural_name)
+        if qubo_name:
+            plan.setdefault(qubo_name, []).append(i)
+    return [(name, np.array(idxs)) for name, idxs in plan.items()]
+
+
+_COLLAPSE_PLAN = _build_collapse_plan()
+
+
+def _quantize_dynamic(model: RuleSelectorNetwork) -> RuleSelectorNetwork:
+    """
+    将模型中的 nn.Linear 动态量化为 int8 权重
+    
+    当前平台没有可用的量化后端时原样返回。
+    
+    Args:
+        model: 评估模式下的规则选择网络
+        
+    Returns:
+        量化后的模型副本（或原模型）
+    """
+    if torch.backends.quantized.engine == "none":
+        return model
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # 新版 PyTorch 对 eager 量化接口给出弃用提示
+        return torch.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+
 class NeuralGuidedQUBOBuilder(QUBOBuilder):
     """
     神经引导的 QUBO 构建器
@@ -51,11 +97,15 @@ class NeuralGuidedQUBOBuilder(QUBOBuilder):
         self.use_neural_weights = use_neural_weights
         self.base_rule_penalty = base_rule_penalty
         self.rule_weights: Dict[str, float] = {}
+        # 固定权重模式下的均匀权重（只构建一次，调用方只读）
+        self._uniform_weights = {name: 1.0 for name in RuleSelectorNetwork.RULE_NAMES}
         
         # 初始化神经网络组件
         if use_neural_weights:
             self.feature_encoder = FeatureEncoder()
             self.rule_selector = RuleSelectorNetwork()
+            # 按特征向量字节缓存预测结果：同一模板的实例特征往往完全相同
+            self._cached_predict = lru_cache(maxsize=4096)(self._predict_from_bytes)
             
             # 加载训练好的模型
             if model_path:
@@ -66,13 +116,22 @@ class NeuralGuidedQUBOBuilder(QUBOBuilder):
         else:
             print("ℹ 使用固定权重模式（不使用神经网络）")
     
-    def load_model(self, model_path: str):
-        """加载训练好的模型"""
+    def load_model(self, model_path: str, quantize: bool = True):
+        """
+        加载训练好的模型
+        
+        Args:
+            model_path: 模型权重路径
+            quantize: 是否将全连接层动态量化为 int8（仅用于推理）
+        """
         try:
             self.rule_selector.load_state_dict(
                 torch.load(model_path, map_location='cpu', weights_only=True)
             )
             self.rule_selector.eval()
+            if quantize:
+                self.rule_selector = _quantize_dynamic(self.rule_selector)
+            self._cached_predict.cache_clear()  # 权重已变，旧预测失效
             print(f"✓ 模型加载成功")
         except Exception as e:
             print(f"✗ 模型加载失败: {e}")
@@ -90,29 +149,64 @@ class NeuralGuidedQUBOBuilder(QUBOBuilder):
             规则权重字典 {rule_name: weight}
         """
         if not self.use_neural_weights:
-            # 返回均匀权重
-            return {name: 1.0 for name in RuleSelectorNetwork.RULE_NAMES}
+            # 返回均匀权重（共享字典，勿修改）
+            return self._uniform_weights
         
         # 1. 编码特征
         features = self.feature_encoder.encode(axioms, goal)
         
-        # 2. 预测权重
-        weights = self.rule_selector.predict_rule_weights(features)
-        
-        # 3. 映射到 QUBO 规则库名称
-        qubo_weights = {}
-        for neural_name, weight in weights.items():
-            qubo_name = RULE_NAME_MAPPING.get(neural_name)
-            if qubo_name:
-                # 如果多个神经网络规则映射到同一个 QUBO 规则，取最大值
-                if qubo_name in qubo_weights:
-                    qubo_weights[qubo_name] = max(qubo_weights[qubo_name], weight)
-                else:
-                    qubo_weights[qubo_name] = weight
-        
-        return qubo_weights
+        # 2. 预测权重并映射到 QUBO 规则库名称（按特征缓存，返回副本供调用方修改）
+        return dict(self._cached_predict(features.tobytes()))
     
-    def build(self, axioms: List[str], goal: str) -> Tuple[Any, Dict, float]:
+    def _predict_from_bytes(self, feature_bytes: bytes) -> Dict[str, float]:
+        """
+        由特征向量字节预测 QUBO 规则权重（被 _cached_predict 缓存）
+        
+        Args:
+            feature_bytes: float32 特征向量的 tobytes() 结果
+            
+        Returns:
+            规则权重字典 {rule_name: weight}
+        """
+        # bytearray 使数组可写，torch.from_numpy 不会对只读内存发出警告
+        features = np.frombuffer(bytearray(feature_bytes), dtype=np.float32).reshape(1, -1)
+        weights = self.rule_selector.predict_rule_weights_batch(features)
+        return self._collapse_weights(weights[0])
+    
+    def predict_rule_weights_batch(self, axioms_list: List[List[str]],
+                                   goals: List[str]) -> List[Dict[str, float]]:
+        """
+        批量预测多个问题的规则权重（特征编码与前向传播各一次）
+        
+        Args:
+            axioms_list: 每个问题的公理列表
+            goals: 每个问题的目标
+            
+        Returns:
+            每个问题的规则权重字典列表
+        """
+        if not self.use_neural_weights:
+            return [{name: 1.0 for name in RuleSelectorNetwork.RULE_NAMES} for _ in goals]
+        
+        features = self.feature_encoder.encode_batch(axioms_list, goals)
+        weights = self.rule_selector.predict_rule_weights_batch(features)
+        
+        return [self._collapse_weights(row) for row in weights]
+    
+    @staticmethod
+    def _collapse_weights(weights: np.ndarray) -> Dict[str, float]:
+        """
+        按 _COLLAPSE_PLAN 将神经网络输出映射到 QUBO 规则库名称
+        
+        Args:
+            weights: 神经网络输出，形状为 (num_rules,)，顺序与 RULE_NAMES 一致
+            
+        Returns:
+            QUBO 规则权重 {rule_name: weight}
+        """
+        return {name: float(weights[idxs].max()) for name, idxs in _COLLAPSE_PLAN}
+    
+    def build(self, axioms: List[str], goal: str) -> Tuple[QUBOModel, Mapping, float]:
         """
         构建神经引导的 QUBO 问题
         
@@ -121,20 +215,23 @@ class NeuralGuidedQUBOBuilder(QUBOBuilder):
             goal: 目标字符串
             
         Returns:
-            (PyQUBO Model, 变量映射, offset)
+            (QUBOModel, 变量映射, offset)，第三项恒为 0.0（见 QUBOBuilder.build）
         """
         # 1. 预测规则权重
-        print(f"\n[神经网络预测阶段]")
         self.rule_weights = self.predict_rule_weights(axioms, goal)
-        
-        print(f"预测的规则权重:")
-        for rule_name, weight in sorted(self.rule_weights.items(), key=lambda x: -x[1]):
-            if weight > 0.5:  # 只显示权重 > 0.5 的规则
-                print(f"  {rule_name}: {weight:.4f}")
+        if logger.isEnabledFor(logging.DEBUG):
+            self._log_weights()
         
         # 2. 调用父类的 build 方法
         return super().build(axioms, goal)
     
+    def _log_weights(self):
+        """以 DEBUG 级别输出权重 > 0.5 的规则（按权重降序）"""
+        logger.debug("预测的规则权重:")
+        for rule_name, weight in sorted(self.rule_weights.items(), key=lambda x: -x[1]):
+            if weight > 0.5:
+                logger.debug("  %s: %.4f", rule_name, weight)
+    
     def get_rule_penalty(self, rule_name: str) -> float:
         """
         获取特定规则的惩罚系数
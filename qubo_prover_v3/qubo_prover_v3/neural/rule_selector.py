@@ -7,6 +7,8 @@
 3. 支持训练和推理模式
 """
 
+import warnings
+import weakref
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -14,6 +16,12 @@ from typing import Dict, List
 import numpy as np
 
 
+# 模型实例 -> TorchScript 编译后的模块（与原模型共享参数；弱引用，随模型一起释放）
+# 无法编译的模型记为 _UNSCRIPTABLE；值中不能引用模型自身，否则条目永远不会被释放
+_UNSCRIPTABLE = False
+_SCRIPTED: "weakref.WeakKeyDictionary[nn.Module, object]" = weakref.WeakKeyDictionary()
+
+
 class RuleSelectorNetwork(nn.Module):
     """规则选择器神经网络"""
     
@@ -52,20 +60,21 @@ class RuleSelectorNetwork(nn.Module):
         # Dropout 防止过拟合
         self.dropout = nn.Dropout(0.2)
         
-        # Batch Normalization 加速训练
+        # Batch Normalization 加速训练（推理时 eval() 模式使用滑动统计量，单样本同样适用）
         self.bn1 = nn.BatchNorm1d(hidden_size)
         self.bn2 = nn.BatchNorm1d(hidden_size)
     
-    def forward(self, x):
+    def forward(self, x, return_logits: bool = False):
         """
         前向传播
         
         Args:
             x: 输入特征，形状为 (batch_size, input_size) 或 (input_size,)
+            return_logits: 为 True 时返回 sigmoid 之前的 logits（训练时配合 BCEWithLogitsLoss）
         
         Returns:
             规则权重，形状为 (batch_size, num_rules) 或 (num_rules,)
-            每个权重在 0-1 之间
+            每个权重在 0-1 之间（return_logits=True 时为未归一化的 logits）
         """
         # 处理单个样本的情况
         if x.dim() == 1:
@@ -76,21 +85,20 @@ class RuleSelectorNetwork(nn.Module):
         
         # 第一层
         x = self.fc1(x)
-        if x.size(0) > 1:  # Batch Normalization 需要 batch_size > 1
-            x = self.bn1(x)
+        x = self.bn1(x)
         x = F.relu(x)
         x = self.dropout(x)
         
         # 第二层
         x = self.fc2(x)
-        if x.size(0) > 1:
-            x = self.bn2(x)
+        x = self.bn2(x)
         x = F.relu(x)
         x = self.dropout(x)
         
         # 输出层
         x = self.fc3(x)
-        x = torch.sigmoid(x)  # 输出 0-1 之间的权重
+        if not return_logits:
+            x = torch.sigmoid(x)  # 输出 0-1 之间的权重
         
         # 如果输入是单个样本，输出也应该是单个样本
         if squeeze_output:
@@ -111,18 +119,56 @@ class RuleSelectorNetwork(nn.Module):
         self.eval()  # 设置为评估模式
         
         with torch.no_grad():
-            # 转换为 Tensor
-            features_tensor = torch.tensor(features, dtype=torch.float32)
-            
-            # 前向传播
-            weights = self.forward(features_tensor)
+            # 转换为 Tensor（零拷贝）
+            features_tensor = torch.from_numpy(np.ascontiguousarray(features, dtype=np.float32))
             
-            # 转换为字典
-            weights_dict = {}
-            for i, rule_name in enumerate(self.RULE_NAMES):
-                weights_dict[rule_name] = float(weights[i])
+            # 前向传播，一次性转换为 Python 列表
+            weights = self._scripted()(features_tensor.unsqueeze(0)).squeeze(0).tolist()
+        
+        return dict(zip(self.RULE_NAMES, weights))
+    
+    def predict_rule_weights_batch(self, features: np.ndarray) -> np.ndarray:
+        """
+        批量预测规则权重（推理模式，一次前向传播）
+        
+        Args:
+            features: 特征矩阵，形状为 (N, input_size)
         
-        return weights_dict
+        Returns:
+            规则权重矩阵，形状为 (N, num_rules)，列顺序与 RULE_NAMES 一致
+        """
+        self.eval()
+        
+        with torch.no_grad():
+            features_tensor = torch.from_numpy(np.ascontiguousarray(features, dtype=np.float32))
+            weights = self._scripted()(features_tensor)
+        
+        return weights.numpy()
+    
+    def _scripted(self) -> nn.Module:
+        """
+        获取 TorchScript 编译后的前向模块（首次调用时编译并缓存）
+        
+        编译结果与本模型共享参数，load_state_dict 后无需重新编译；
+        无法编译时（如某些量化层）退回到 eager 模式的自身。
+        
+        Returns:
+            评估模式下的前向模块
+        """
+        scripted = _SCRIPTED.get(self)
+        if scripted is None:
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", FutureWarning)  # 新版 PyTorch 标记 jit 为弃用
+                    scripted = torch.jit.script(self)
+            except Exception:
+                scripted = _UNSCRIPTABLE
+            _SCRIPTED[self] = scripted
+        if scripted is _UNSCRIPTABLE:
+            scripted = self
+        if scripted.training:
+            scripted.eval()
+        return scripted
     
     def get_rule_names(self) -> List[str]:
         """获取规则名称列表"""
@@ -8,6 +8,7 @@
 4. 保存模型
 """
 
+import os
 import torch
 import torch.nn as nn
 import torch.optim as optim
@@ -17,12 +18,24 @@ from typing import List, Dict, Tuple
 import json
 from tqdm import tqdm
 
+# orjson 是可选依赖（更快的 JSON 解析）
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from .feature_encoder import FeatureEncoder
 from .rule_selector import RuleSelectorNetwork
+from ..data.generator import GeneratedDataset, encode_dataset
 
 
 class LogicProofDataset(Dataset):
-    """逻辑证明数据集"""
+    """
+    逻辑证明数据集
+    
+    构造时一次性编码全部样本，特征与标签分别存放在两个连续张量中，
+    __getitem__ 只做切片。
+    """
     
     def __init__(self, data_path: str, feature_encoder: FeatureEncoder):
         """
@@ -35,8 +48,21 @@ class LogicProofDataset(Dataset):
         self.feature_encoder = feature_encoder
         
         # 加载数据
-        with open(data_path, 'r', encoding='utf-8') as f:
-            self.data = json.load(f)
+        if orjson is not None:
+            with open(data_path, 'rb') as f:
+                self.data = orjson.loads(f.read())
+        else:
+            with open(data_path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+        
+        # 预编码特征（整批向量化）与多热标签，与 save_dataset 的预编码共用同一实现
+        columns = GeneratedDataset(axioms=[s['axioms'] for s in self.data],
+                                   goals=[s['goal'] for s in self.data],
+                                   useful_rules=[s['useful_rules'] for s in self.data])
+        features, labels = encode_dataset(columns, feature_encoder)
+        
+        self.features = torch.from_numpy(features)  # (N, feature_dim)
+        self.labels = torch.from_numpy(labels)      # (N, num_rules)
         
         print(f"加载了 {len(self.data)} 个样本")
     
@@ -51,52 +77,153 @@ class LogicProofDataset(Dataset):
             features: 特征向量
             labels: 标签向量（哪些规则有用）
         """
-        sample = self.data[idx]
-        
-        # 编码特征
-        features = self.feature_encoder.encode(sample['axioms'], sample['goal'])
-        
-        # 创建标签（one-hot编码）
-        labels = np.zeros(8, dtype=np.float32)  # 8个规则
-        
-        # 规则名称到索引的映射
-        rule_to_idx = {
-            "modus_ponens": 0,
-            "modus_tollens": 1,
-            "and_elimination_left": 2,
-            "and_elimination_right": 3,
-            "and_introduction": 4,
-            "or_introduction_left": 5,
-            "or_introduction_right": 6,
-            "double_negation": 7,
-        }
-        
-        # 标记有用的规则
-        for rule_name in sample['useful_rules']:
-            if rule_name in rule_to_idx:
-                labels[rule_to_idx[rule_name]] = 1.0
+        return self.features[idx], self.labels[idx]
+
+
+class LogicProofEncodedDataset(Dataset):
+    """
+    预编码的逻辑证明数据集
+    
+    直接读取 save_dataset(..., save_encoded=True) 生成的特征 / 标签 .npy 文件，
+    默认以内存映射方式打开，无需解析 JSON 或重新编码特征。
+    """
+    
+    def __init__(self, features_path: str, labels_path: str, mmap: bool = True):
+        """
+        初始化数据集
+        
+        Args:
+            features_path: 特征矩阵文件路径（.npy，形状 (N, feature_dim)）
+            labels_path: 标签矩阵文件路径（.npy，形状 (N, num_rules)）
+            mmap: 是否以只读内存映射方式加载
+        """
+        mmap_mode = 'r' if mmap else None
+        self.features = np.load(features_path, mmap_mode=mmap_mode)
+        self.labels = np.load(labels_path, mmap_mode=mmap_mode)
+        
+        if len(self.features) != len(self.labels):
+            raise ValueError(f"特征与标签数量不一致: {len(self.features)} vs {len(self.labels)}")
+        
+        print(f"加载了 {len(self.features)} 个预编码样本")
+    
+    def __len__(self):
+        return len(self.features)
+    
+    def __getitem__(self, idx):
+        # 内存映射数组只读，逐行复制出一份可写的小数组
+        return (torch.from_numpy(np.array(self.features[idx], dtype=np.float32)),
+                torch.from_numpy(np.array(self.labels[idx], dtype=np.float32)))
+
+
+class LogicProofDatasetNPZ(Dataset):
+    """
+    .npz 格式的逻辑证明数据集
+    
+    读取 scripts/prepare_dataset.py 生成的 .npz 文件（features / labels 两个数组），
+    加载时间只取决于文件大小，无需解析 JSON 或编码特征。
+    """
+    
+    def __init__(self, data_path: str):
+        """
+        初始化数据集
+        
+        Args:
+            data_path: .npz 文件路径
+        """
+        # .npz 成员无法内存映射，直接整体读入连续数组
+        with np.load(data_path) as data:
+            self.features = torch.from_numpy(np.ascontiguousarray(data['features'], dtype=np.float32))
+            self.labels = torch.from_numpy(np.ascontiguousarray(data['labels'], dtype=np.float32))
+        
+        if len(self.features) != len(self.labels):
+            raise ValueError(f"特征与标签数量不一致: {len(self.features)} vs {len(self.labels)}")
+        
+        print(f"加载了 {len(self.features)} 个预编码样本")
+    
+    def __len__(self):
+        return len(self.features)
+    
+    def __getitem__(self, idx):
+        return self.features[idx], self.labels[idx]
+
 
-        # 显式转换为 Python float 以兼容 NumPy 2.x
-        return torch.tensor(features, dtype=torch.float32), torch.tensor(labels, dtype=torch.float32)
+class InMemoryBatches:
+    """
+    设备端张量上的小批量迭代器
+    
+    整个数据集预先放到目标设备上，每个 epoch 只生成一次随机排列并按下标取批次，
+    不经过 DataLoader 的 collate 与工作进程。可直接传给 Trainer.train_epoch / validate。
+    """
+    
+    def __init__(self, features: torch.Tensor, labels: torch.Tensor, batch_size: int,
+                 shuffle: bool = False, drop_last: bool = False):
+        """
+        初始化迭代器
+        
+        Args:
+            features: 特征矩阵，形状为 (N, feature_dim)
+            labels: 标签矩阵，形状为 (N, num_rules)
+            batch_size: 批次大小
+            shuffle: 每个 epoch 是否打乱顺序
+            drop_last: 是否丢弃不完整的最后一批
+        """
+        if len(features) != len(labels):
+            raise ValueError(f"特征与标签数量不一致: {len(features)} vs {len(labels)}")
+        
+        self.features = features
+        self.labels = labels
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+    
+    def __len__(self):
+        n = len(self.features)
+        if self.drop_last:
+            return n // self.batch_size
+        return (n + self.batch_size - 1) // self.batch_size
+    
+    def __iter__(self):
+        perm = None
+        if self.shuffle:
+            perm = torch.randperm(len(self.features), device=self.features.device)
+        
+        for b in range(len(self)):
+            start = b * self.batch_size
+            end = start + self.batch_size
+            if perm is None:
+                yield self.features[start:end], self.labels[start:end]
+            else:
+                idx = perm[start:end]
+                yield self.features[idx], self.labels[idx]
 
 
 class Trainer:
     """训练器"""
     
-    def __init__(self, model: RuleSelectorNetwork, device='cpu'):
+    def __init__(self, model: RuleSelectorNetwork, device='cpu', compile_model: bool = False,
+                 amp: bool = False):
         """
         初始化训练器
         
         Args:
             model: 规则选择器模型
             device: 设备（'cpu' 或 'cuda'）
+            compile_model: 是否用 torch.compile 编译前向传播（需要 PyTorch >= 2.0）
+            amp: 是否在训练的前向传播中使用 bfloat16 自动混合精度
         """
         self.model = model
         self.device = device
+        self.amp = amp
         self.model.to(device)
         
-        # 损失函数：二元交叉熵
-        self.criterion = nn.BCELoss()
+        # 训练 / 验证走的前向模块；编译后的模块与 self.model 共享参数，
+        # 保存时仍使用 self.model.state_dict()，键名不带编译包装的前缀
+        self.forward_model = model
+        if compile_model:
+            self.forward_model = torch.compile(model, mode='reduce-overhead', fullgraph=True)
+        
+        # 损失函数：二元交叉熵（作用于 logits，sigmoid 与 log 融合，数值更稳定）
+        self.criterion = nn.BCEWithLogitsLoss()
         
         # 优化器：Adam
         self.optimizer = optim.Adam(model.parameters(), lr=0.001)
@@ -115,26 +242,36 @@ class Trainer:
         
         Returns:
             平均损失
+        
+        Raises:
+            ValueError: 加载器一个批次也不产生（如训练集小于 batch_size 且 drop_last=True）
         """
+        if len(train_loader) == 0:
+            raise ValueError("训练数据加载器没有任何批次：训练集为空，"
+                             "或样本数小于 batch_size 且丢弃了不完整的最后一批")
+        
         self.model.train()
-        total_loss = 0.0
+        # 损失在设备端累加，避免每个批次 .item() 触发同步
+        total_loss = torch.zeros((), device=self.device)
         
         for features, labels in tqdm(train_loader, desc="训练"):
-            features = features.to(self.device)
-            labels = labels.to(self.device)
+            features = features.to(self.device, non_blocking=True)
+            labels = labels.to(self.device, non_blocking=True)
             
-            # 前向传播
-            outputs = self.model(features)
-            loss = self.criterion(outputs, labels)
+            # 前向传播（bf16 指数范围与 fp32 相同，无需 GradScaler）
+            with torch.autocast(device_type=torch.device(self.device).type, dtype=torch.bfloat16,
+                                enabled=self.amp):
+                outputs = self.forward_model(features, return_logits=True)
+                loss = self.criterion(outputs, labels)
             
             # 反向传播
             self.optimizer.zero_grad()
             loss.backward()
             self.optimizer.step()
             
-            total_loss += loss.item()
+            total_loss += loss.detach()
         
-        return total_loss / len(train_loader)
+        return (total_loss / len(train_loader)).item()
     
     def validate(self, val_loader: DataLoader) -> Tuple[float, float]:
         """
@@ -145,35 +282,44 @@ class Trainer:
         
         Returns:
             (平均损失, 准确率)
+        
+        Raises:
+            ValueError: 验证集为空
         """
+        if len(val_loader) == 0:
+            raise ValueError("验证数据加载器没有任何批次：验证集为空")
+        
         self.model.eval()
-        total_loss = 0.0
-        correct = 0
+        # 损失与正确数在设备端累加，循环结束后只同步一次
+        total_loss = torch.zeros((), device=self.device)
+        correct = torch.zeros((), dtype=torch.long, device=self.device)
         total = 0
         
-        with torch.no_grad():
+        with torch.inference_mode():
             for features, labels in val_loader:
-                features = features.to(self.device)
-                labels = labels.to(self.device)
+                features = features.to(self.device, non_blocking=True)
+                labels = labels.to(self.device, non_blocking=True)
                 
                 # 前向传播
-                outputs = self.model(features)
+                outputs = self.forward_model(features, return_logits=True)
                 loss = self.criterion(outputs, labels)
                 
-                total_loss += loss.item()
+                total_loss += loss
                 
-                # 计算准确率（阈值0.5）
-                predictions = (outputs > 0.5).float()
-                correct += (predictions == labels).sum().item()
+                # 计算准确率（阈值0.5，即 logits > 0）
+                predictions = (outputs > 0).float()
+                correct += (predictions == labels).sum()
                 total += labels.numel()
         
-        avg_loss = total_loss / len(val_loader)
-        accuracy = correct / total
+        avg_loss = (total_loss / len(val_loader)).item()
+        accuracy = correct.item() / total
         
         return avg_loss, accuracy
     
     def save_model(self, path: str):
-        """保存模型"""
-        torch.save(self.model.state_dict(), path)
+        """保存模型（先写临时文件再原子替换，中断时不会留下损坏的检查点）"""
+        tmp_path = path + '.tmp'
+        torch.save(self.model.state_dict(), tmp_path)
+        os.replace(tmp_path, path)
         print(f"模型已保存到: {path}")
 
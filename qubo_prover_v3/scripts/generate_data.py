@@ -8,6 +8,7 @@
 import argparse
 import sys
 import os
+from collections import Counter
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -24,6 +25,10 @@ def main():
                         help='输出文件路径')
     parser.add_argument('--seed', type=int, default=42,
                         help='随机种子（默认: 42）')
+    parser.add_argument('--save-encoded', action='store_true',
+                        help='同时保存预编码的特征与标签（.npy，训练时内存映射加载）')
+    parser.add_argument('--num-workers', type=int, default=1,
+                        help='并行生成的进程数（默认: 1；0 表示使用全部 CPU 核；样本较少时始终单进程）')
     
     args = parser.parse_args()
     
@@ -33,25 +38,23 @@ def main():
     print(f"样本数量: {args.num_samples}")
     print(f"输出路径: {args.output}")
     print(f"随机种子: {args.seed}")
+    print(f"进程数: {args.num_workers or os.cpu_count()}")
     print()
     
     # 创建生成器
     generator = TrainingDataGenerator(seed=args.seed)
     
     # 生成数据集
-    dataset = generator.generate_dataset(args.num_samples)
+    dataset = generator.generate_dataset(args.num_samples, num_workers=args.num_workers or None)
     
     # 保存数据集
-    generator.save_dataset(dataset, args.output)
+    generator.save_dataset(dataset, args.output, save_encoded=args.save_encoded)
     
     # 统计信息
     print("\n数据集统计:")
     print("=" * 60)
     
-    template_counts = {}
-    for sample in dataset:
-        template_name = sample['template_name']
-        template_counts[template_name] = template_counts.get(template_name, 0) + 1
+    template_counts = Counter(dataset.template_names)
     
     for template_name, count in sorted(template_counts.items()):
         percentage = count / len(dataset) * 100
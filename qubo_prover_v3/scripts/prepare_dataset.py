@@ -0,0 +1,49 @@
+"""
+预处理数据集脚本：将 JSON 数据集编码为 .npz
+
+用法:
+    python scripts/prepare_dataset.py --data qubo_prover_v3/data/training_data/dataset.json
+"""
+
+import argparse
+import sys
+import os
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from qubo_prover_v3.neural.feature_encoder import FeatureEncoder
+from qubo_prover_v3.neural.trainer import LogicProofDataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description='将 JSON 数据集编码为 .npz')
+    parser.add_argument('--data', type=str, required=True,
+                        help='训练数据路径（JSON文件）')
+    parser.add_argument('--output', type=str, default=None,
+                        help='输出 .npz 路径（默认: 与数据文件同名，扩展名改为 .npz）')
+    
+    args = parser.parse_args()
+    
+    output = args.output or os.path.splitext(args.data)[0] + '.npz'
+    
+    print("=" * 60)
+    print("数据集预处理")
+    print("=" * 60)
+    print(f"数据路径: {args.data}")
+    print(f"输出路径: {output}")
+    print()
+    
+    # 编码一次，保存特征与标签矩阵
+    dataset = LogicProofDataset(args.data, FeatureEncoder())
+    np.savez(output, features=dataset.features.numpy(), labels=dataset.labels.numpy())
+    
+    print(f"特征矩阵: {tuple(dataset.features.shape)}")
+    print(f"标签矩阵: {tuple(dataset.labels.shape)}")
+    print("\n✓ 预处理完成！")
+    print(f"训练时使用: python scripts/train_model.py --data {output}")
+
+
+if __name__ == "__main__":
+    main()
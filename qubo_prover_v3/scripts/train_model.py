@@ -8,6 +8,7 @@
 import argparse
 import sys
 import os
+import numpy as np
 import torch
 from torch.utils.data import DataLoader, random_split
 
@@ -16,17 +17,37 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from qubo_prover_v3.neural.feature_encoder import FeatureEncoder
 from qubo_prover_v3.neural.rule_selector import RuleSelectorNetwork
-from qubo_prover_v3.neural.trainer import Trainer, LogicProofDataset
+from qubo_prover_v3.neural.trainer import (
+    Trainer, LogicProofDataset, LogicProofEncodedDataset, LogicProofDatasetNPZ, InMemoryBatches
+)
+from qubo_prover_v3.data.generator import FEATURES_SUFFIX, LABELS_SUFFIX
+
+
+def _subset_tensors(dataset, indices, device):
+    """
+    取出数据集的一个子集，整体放到目标设备上
+    
+    Args:
+        dataset: 带 features / labels 属性的数据集（LogicProofDataset 等）
+        indices: 样本下标列表
+        device: 目标设备
+    
+    Returns:
+        (features, labels) 两个设备端张量
+    """
+    features = torch.as_tensor(np.asarray(dataset.features)[indices], dtype=torch.float32)
+    labels = torch.as_tensor(np.asarray(dataset.labels)[indices], dtype=torch.float32)
+    return features.to(device), labels.to(device)
 
 
 def main():
     parser = argparse.ArgumentParser(description='训练规则选择器模型')
     parser.add_argument('--data', type=str, required=True,
-                        help='训练数据路径（JSON文件）')
+                        help='训练数据路径（JSON 文件，或 prepare_dataset.py 生成的 .npz 文件）')
     parser.add_argument('--epochs', type=int, default=100,
                         help='训练轮数（默认: 100）')
     parser.add_argument('--batch-size', type=int, default=32,
-                        help='批次大小（默认: 32）')
+                        help='批次大小（默认: 32，至少为 2）')
     parser.add_argument('--val-split', type=float, default=0.2,
                         help='验证集比例（默认: 0.2）')
     parser.add_argument('--output', type=str,
@@ -35,8 +56,23 @@ def main():
     parser.add_argument('--device', type=str, default='cpu',
                         choices=['cpu', 'cuda'],
                         help='设备（默认: cpu）')
+    parser.add_argument('--num-workers', type=int, default=min(4, os.cpu_count() or 1),
+                        help='数据加载进程数（默认: min(4, CPU 核数)）')
+    parser.add_argument('--in-memory', action='store_true',
+                        help='将整个数据集放到设备上按下标切片取批次，不使用 DataLoader（适合小数据集）')
+    parser.add_argument('--compile', action='store_true',
+                        help='用 torch.compile 编译模型前向传播（需要 PyTorch >= 2.0，首个批次较慢）')
+    parser.add_argument('--amp', action='store_true',
+                        help='训练时使用 bfloat16 自动混合精度')
+    parser.add_argument('--patience', type=int, default=10,
+                        help='验证损失连续多少轮无明显下降后提前停止（默认: 10）')
+    parser.add_argument('--min-delta', type=float, default=1e-4,
+                        help='视为明显下降的最小验证损失降幅（默认: 1e-4）')
     
     args = parser.parse_args()
+    if args.batch_size < 2:
+        # 模型在训练模式下始终经过 BatchNorm，每批至少需要 2 个样本
+        parser.error('--batch-size 至少为 2（BatchNorm 在训练时需要每批多于 1 个样本）')
     
     print("=" * 60)
     print("规则选择器训练")
@@ -46,6 +82,7 @@ def main():
     print(f"批次大小: {args.batch_size}")
     print(f"验证集比例: {args.val_split}")
     print(f"设备: {args.device}")
+    print(f"数据加载进程数: {args.num_workers}")
     print()
     
     # 检查 CUDA 可用性
@@ -58,7 +95,15 @@ def main():
     
     # 加载数据集
     print("加载数据集...")
-    dataset = LogicProofDataset(args.data, feature_encoder)
+    features_path = args.data + FEATURES_SUFFIX
+    labels_path = args.data + LABELS_SUFFIX
+    if args.data.endswith('.npz'):
+        dataset = LogicProofDatasetNPZ(args.data)
+    elif os.path.exists(features_path) and os.path.exists(labels_path):
+        # 有预编码的特征时以内存映射方式加载，跳过 JSON 解析与特征编码
+        dataset = LogicProofEncodedDataset(features_path, labels_path)
+    else:
+        dataset = LogicProofDataset(args.data, feature_encoder)
     
     # 划分训练集和验证集
     val_size = int(len(dataset) * args.val_split)
@@ -70,8 +115,24 @@ def main():
     print()
     
     # 创建数据加载器
-    train_loader = DataLoader(train_dataset, batch_size=args.batch_size, shuffle=True)
-    val_loader = DataLoader(val_dataset, batch_size=args.batch_size, shuffle=False)
+    # 训练模式下 BatchNorm 需要 batch_size > 1，只在最后一批恰好为 1 个样本时丢弃它
+    drop_last = train_size % args.batch_size == 1
+    if args.in_memory:
+        train_loader = InMemoryBatches(*_subset_tensors(dataset, train_dataset.indices, args.device),
+                                       args.batch_size, shuffle=True, drop_last=drop_last)
+        val_loader = InMemoryBatches(*_subset_tensors(dataset, val_dataset.indices, args.device),
+                                     args.batch_size)
+    else:
+        # 使用 CUDA 时锁页内存，配合 non_blocking 让拷贝与计算重叠
+        # 工作进程在各 epoch 间保持存活，避免每轮重新创建
+        loader_kwargs = dict(
+            batch_size=args.batch_size,
+            num_workers=args.num_workers,
+            persistent_workers=args.num_workers > 0,
+            pin_memory=args.device == 'cuda',
+        )
+        train_loader = DataLoader(train_dataset, shuffle=True, drop_last=drop_last, **loader_kwargs)
+        val_loader = DataLoader(val_dataset, shuffle=False, **loader_kwargs)
     
     # 创建模型
     model = RuleSelectorNetwork(
@@ -84,10 +145,11 @@ def main():
     print()
     
     # 创建训练器
-    trainer = Trainer(model, device=args.device)
+    trainer = Trainer(model, device=args.device, compile_model=args.compile, amp=args.amp)
     
     # 训练循环
     best_val_loss = float('inf')
+    epochs_since_improve = 0
     
     print("开始训练...")
     print("=" * 60)
@@ -109,12 +171,20 @@ def main():
         print(f"  验证准确率: {val_accuracy:.4f}")
         print()
         
-        # 保存最佳模型
-        if val_loss < best_val_loss:
+        # 保存最佳模型（降幅不足 min_delta 时不重写检查点）
+        if val_loss < best_val_loss - args.min_delta:
             best_val_loss = val_loss
+            epochs_since_improve = 0
             trainer.save_model(args.output)
             print(f"  ✓ 保存最佳模型（验证损失: {val_loss:.4f}）")
             print()
+        else:
+            epochs_since_improve += 1
+        
+        # 提前停止
+        if epochs_since_improve >= args.patience:
+            print(f"验证损失已连续 {args.patience} 轮无明显下降，提前停止")
+            break
     
     print("=" * 60)
     print("训练完成！")
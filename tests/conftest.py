@@ -0,0 +1,33 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+
+from qubo_prover_v3.core.qubo_builder import QUBOBuilder
+from qubo_prover_v3.core.sampler import NealBackend
+
+
+@pytest.fixture(scope="session")
+def backend():
+    return NealBackend()
+
+
+@pytest.fixture(scope="session")
+def build_cache():
+    return {}
+
+
+@pytest.fixture(scope="session")
+def compile_problem(build_cache):
+    """(axioms, goal) -> (bqm, var_info)，同一问题在整个会话中只构建、编译一次"""
+    def _compile(axioms, goal):
+        key = (tuple(axioms), goal)
+        if key not in build_cache:
+            builder = QUBOBuilder()
+            model, _, _ = builder.build(axioms, goal)
+            _, bqm, _ = builder.compile_qubo(model)
+            build_cache[key] = (bqm, builder.get_variable_info())
+        return build_cache[key]
+    return _compile
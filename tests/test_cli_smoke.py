@@ -1,7 +1,11 @@
 import sys
 import os
+import io
+import contextlib
 import subprocess
 
+from qubo_prover_v3.cli import main
+
 
 def test_cli_smoke_no_backend_run():
     root = os.path.dirname(os.path.dirname(__file__))
@@ -15,3 +19,17 @@ def test_cli_smoke_no_backend_run():
     except Exception:
         assert False
 
+
+def test_cli_main_in_process():
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        rc = main(["--axioms", "P;P->Q", "--goal", "Q", "--reads", "5"])
+    out = buf.getvalue()
+    assert "QUBO Prover V3" in out
+    assert rc == 0
+    assert "✓ 证明成功！" in out
+
+
+def test_cli_main_rejects_empty_axioms(capsys):
+    assert main(["--axioms", " ; ", "--goal", "Q"]) == 1
+    assert "错误" in capsys.readouterr().err
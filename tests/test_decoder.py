@@ -3,8 +3,6 @@ import os
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from qubo_prover_v3.core.qubo_builder import QUBOBuilder
-from qubo_prover_v3.core.sampler import NealBackend
 from qubo_prover_v3.core.decoder import (
     decode_sampleset,
     best_by_lowest_energy,
@@ -13,20 +11,20 @@ from qubo_prover_v3.core.decoder import (
 )
 
 
-def _solve(axioms, goal, reads=80):
-    builder = QUBOBuilder()
-    model, var_map, _ = builder.build(axioms, goal)
-    qubo, bqm, _ = builder.compile_qubo(model)
-    backend = NealBackend()
-    sampleset = backend.sample_bqm(bqm, num_reads=reads)
+DEFAULT_READS = 5
+SEED = 0
+
+
+def _solve(backend, compile_problem, axioms, goal, reads=DEFAULT_READS):
+    bqm, var_info = compile_problem(axioms, goal)
+    sampleset = backend.sample_bqm(bqm, num_reads=reads, seed=SEED)
     rows = decode_sampleset(sampleset)
     assignment, energy = best_by_lowest_energy(rows)
-    var_info = builder.get_variable_info()
     return assignment, var_info
 
 
-def test_verify_assignment_success_and_path():
-    assignment, var_info = _solve(["P", "P->Q"], "Q")
+def test_verify_assignment_success_and_path(backend, compile_problem):
+    assignment, var_info = _solve(backend, compile_problem, ["P", "P->Q"], "Q")
     axiom_vars = var_info["axiom_vars"]
     goal_var = var_info["goal_var"]
     success, message = verify_assignment(assignment, axiom_vars, goal_var, var_info)
@@ -38,8 +36,8 @@ def test_verify_assignment_success_and_path():
     assert any("步骤 4" in s for s in steps)
 
 
-def test_verify_assignment_failure_message():
-    assignment, var_info = _solve(["P", "P->Q"], "~Q")
+def test_verify_assignment_failure_message(backend, compile_problem):
+    assignment, var_info = _solve(backend, compile_problem, ["P", "P->Q"], "~Q")
     axiom_vars = var_info["axiom_vars"]
     goal_var = var_info["goal_var"]
     success, message = verify_assignment(assignment, axiom_vars, goal_var, var_info)
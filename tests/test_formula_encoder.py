@@ -7,14 +7,30 @@ from qubo_prover_v3.core.formula_encoder import FormulaEncoder
 from qubo_prover_v3.core.ast import Var, Not, And, Or, Imply
 from pyqubo import Binary
 
+try:
+    import neal
+    _SAMPLER = neal.SimulatedAnnealingSampler()
+except Exception:
+    _SAMPLER = None
+
+
+# 表达式字符串 -> 编译后的 BQM
+_BQM_CACHE = {}
+
+
+def _compile_cached(expr):
+    key = str(expr)
+    if key not in _BQM_CACHE:
+        _BQM_CACHE[key] = expr.compile().to_bqm()
+    return _BQM_CACHE[key]
+
 
 def _minimize_energy(expr):
-    model = expr.compile()
-    bqm = model.to_bqm()
+    if _SAMPLER is None:
+        return None, None
     try:
-        import neal
-        sampler = neal.SimulatedAnnealingSampler()
-        sampleset = sampler.sample(bqm, num_reads=50)
+        bqm = _compile_cached(expr)
+        sampleset = _SAMPLER.sample(bqm, num_reads=50)
         best = sampleset.first.sample
         energy = sampleset.first.energy
         return best, energy
@@ -8,8 +8,6 @@ try:
 except Exception:
     pytest = None
 
-from qubo_prover_v3.core.qubo_builder import QUBOBuilder
-from qubo_prover_v3.core.sampler import NealBackend
 from qubo_prover_v3.core.decoder import (
     decode_sampleset,
     best_by_lowest_energy,
@@ -17,48 +15,51 @@ from qubo_prover_v3.core.decoder import (
 )
 
 
-def _prove(axioms, goal, reads=80):
-    builder = QUBOBuilder()
-    model, var_map, _ = builder.build(axioms, goal)
-    qubo, bqm, _ = builder.compile_qubo(model)
-    backend = NealBackend()
-    sampleset = backend.sample_bqm(bqm, num_reads=reads)
+# 反例需要足够多的读取，才能说明“找不到满足全部约束的解”不是采样不足造成的
+DEFAULT_READS = 80
+SEED = 0
+
+
+def _prove(backend, compile_problem, axioms, goal, reads=DEFAULT_READS):
+    bqm, var_info = compile_problem(axioms, goal)
+    sampleset = backend.sample_bqm(bqm, num_reads=reads, seed=SEED)
     rows = decode_sampleset(sampleset)
     assignment, energy = best_by_lowest_energy(rows)
-    var_info = builder.get_variable_info()
     axiom_vars = var_info["axiom_vars"]
     goal_var = var_info["goal_var"]
     success, message = verify_assignment(assignment, axiom_vars, goal_var, var_info)
     return success, message
 
 
-def test_goal_contradiction_should_fail():
-    success, message = _prove(["P", "P->Q"], "~Q")
+def test_goal_contradiction_should_fail(backend, compile_problem):
+    success, message = _prove(backend, compile_problem, ["P", "P->Q"], "~Q")
     assert not success
+    assert message.startswith("结构约束违反")
 
 
-def test_unrelated_goal_should_fail():
-    success, message = _prove(["P&Q"], "R")
+def test_unrelated_goal_should_fail(backend, compile_problem):
+    success, message = _prove(backend, compile_problem, ["P&Q"], "R")
     assert not success
 
 
-def test_contradictory_axioms_should_fail():
-    success, message = _prove(["P", "~P"], "Q")
+def test_contradictory_axioms_should_fail(backend, compile_problem):
+    success, message = _prove(backend, compile_problem, ["P", "~P"], "Q")
     assert not success
+    assert "否定约束违反" in message
 
 
-def test_known_limitation_unprovable_but_satisfiable():
+def test_known_limitation_unprovable_but_satisfiable(backend, compile_problem):
     if pytest is None:
         return
-    success, message = _prove(["P"], "R")
+    success, message = _prove(backend, compile_problem, ["P"], "R")
     pytest.xfail("当前体系检查的是可满足性而非可导性")
     assert not success
 
 
-def test_known_limitation_tautology_goal():
+def test_known_limitation_tautology_goal(backend, compile_problem):
     if pytest is None:
         return
-    success, message = _prove([], "P|~P")
+    success, message = _prove(backend, compile_problem, [], "P|~P")
     pytest.xfail("当前体系无公理也可满足部分目标")
     assert not success
 
@@ -3,8 +3,6 @@ import os
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from qubo_prover_v3.core.qubo_builder import QUBOBuilder
-from qubo_prover_v3.core.sampler import NealBackend
 from qubo_prover_v3.core.decoder import (
     decode_sampleset,
     best_by_lowest_energy,
@@ -12,57 +10,58 @@ from qubo_prover_v3.core.decoder import (
 )
 
 
-def _prove(axioms, goal, reads=80):
-    builder = QUBOBuilder()
-    model, var_map, _ = builder.build(axioms, goal)
-    qubo, bqm, _ = builder.compile_qubo(model)
-    backend = NealBackend()
-    sampleset = backend.sample_bqm(bqm, num_reads=reads)
+# 这些问题只有 2-4 个变量，少量读取即可找到基态；固定种子保证 CI 结果确定
+DEFAULT_READS = 5
+SEED = 0
+
+
+def _prove(backend, compile_problem, axioms, goal, reads=DEFAULT_READS):
+    bqm, var_info = compile_problem(axioms, goal)
+    sampleset = backend.sample_bqm(bqm, num_reads=reads, seed=SEED)
     rows = decode_sampleset(sampleset)
     assignment, energy = best_by_lowest_energy(rows)
-    var_info = builder.get_variable_info()
     axiom_vars = var_info["axiom_vars"]
     goal_var = var_info["goal_var"]
     success, message = verify_assignment(assignment, axiom_vars, goal_var, var_info)
     return success, message
 
 
-def test_modus_ponens():
-    success, message = _prove(["P", "P->Q"], "Q")
+def test_modus_ponens(backend, compile_problem):
+    success, message = _prove(backend, compile_problem, ["P", "P->Q"], "Q")
     assert success
 
 
-def test_modus_tollens():
-    success, message = _prove(["P->Q", "~Q"], "~P")
+def test_modus_tollens(backend, compile_problem):
+    success, message = _prove(backend, compile_problem, ["P->Q", "~Q"], "~P")
     assert success
 
 
-def test_and_elimination_left():
-    success, message = _prove(["P&Q"], "P")
+def test_and_elimination_left(backend, compile_problem):
+    success, message = _prove(backend, compile_problem, ["P&Q"], "P")
     assert success
 
 
-def test_and_elimination_right():
-    success, message = _prove(["P&Q"], "Q")
+def test_and_elimination_right(backend, compile_problem):
+    success, message = _prove(backend, compile_problem, ["P&Q"], "Q")
     assert success
 
 
-def test_and_introduction():
-    success, message = _prove(["P", "Q"], "P&Q")
+def test_and_introduction(backend, compile_problem):
+    success, message = _prove(backend, compile_problem, ["P", "Q"], "P&Q")
     assert success
 
 
-def test_or_introduction_from_p():
-    success, message = _prove(["P"], "P|Q")
+def test_or_introduction_from_p(backend, compile_problem):
+    success, message = _prove(backend, compile_problem, ["P"], "P|Q")
     assert success
 
 
-def test_or_introduction_from_q():
-    success, message = _prove(["Q"], "P|Q")
+def test_or_introduction_from_q(backend, compile_problem):
+    success, message = _prove(backend, compile_problem, ["Q"], "P|Q")
     assert success
 
 
-def test_double_negation_elimination():
-    success, message = _prove(["~~P"], "P")
+def test_double_negation_elimination(backend, compile_problem):
+    success, message = _prove(backend, compile_problem, ["~~P"], "P")
     assert success
 
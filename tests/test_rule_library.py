@@ -0,0 +1,50 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+from pyqubo import Binary
+
+from qubo_prover_v3.core.rule_library import COOBuilder, RULE_EMITTERS, RULE_LIBRARY
+
+
+def _pyqubo_matrix(expr, names):
+    qubo, offset = expr.compile().to_qubo()
+    index = {name: i for i, name in enumerate(names)}
+    Q = np.zeros((len(names), len(names)))
+    for (a, b), coeff in qubo.items():
+        i, j = sorted((index[a], index[b]))
+        Q[i, j] += coeff
+    return Q, offset
+
+
+def test_coeff_tables_match_pyqubo_expansion():
+    for rule_name, rule in RULE_LIBRARY.items():
+        names = [f"x{i}" for i in range(rule.VAR_ARITY)]
+        expected, _ = _pyqubo_matrix(rule.encode(*[Binary(n) for n in names]), names)
+        Q = np.zeros((rule.VAR_ARITY, rule.VAR_ARITY))
+        for i, j, coeff in rule.COEFFS:
+            i, j = sorted((i, j))
+            Q[i, j] += coeff
+        assert np.allclose(Q, expected), rule_name
+
+
+def test_coo_builder_coalesces_duplicates():
+    coo = COOBuilder()
+    RULE_EMITTERS["modus_ponens"](coo, 0, 1, 2, 3, 2.0)
+    RULE_EMITTERS["modus_ponens"](coo, 0, 1, 2, 3, 2.0)
+    qubo = coo.to_dict()
+    assert len(coo) == 10
+    assert qubo[(3, 3)] == 12.0
+    assert qubo[(2, 3)] == -8.0
+    assert all(i <= j for i, j in qubo)
+
+
+def test_generated_emitters_match_coeff_tables():
+    for rule_name, rule in RULE_LIBRARY.items():
+        idx = tuple(range(10, 10 + rule.VAR_ARITY))
+        coo = COOBuilder()
+        RULE_EMITTERS[rule_name](coo, *idx, 1.5)
+        expected = [(idx[i], idx[j], 1.5 * c) for i, j, c in rule.COEFFS]
+        assert list(zip(coo.rows, coo.cols, coo.vals)) == expected, rule_name